@@ -7,3 +7,20 @@
     - Use Q-learning when it has learned enough about a state.
     - Fall back to Minimax when Q-values are uncertain.
     - Explore moves occasionally to improve learning.
+- tkselfplay.py: the AI vs AI window behind tkv5.py and tkv6.py, which only pick the agent
+- core.py: the engines and agents (QLearningAgent, MinimaxAgent, HeuristicAgent, HybridAgent) shared by the front-ends and the headless tools; it imports no GUI toolkit and no NumPy, so training, benchmarks and the server start without pygame or tkinter (`python bench.py --suite startup` times the imports)
+- solver.py: shared minimax solver (alpha-beta + transposition table) used by the minimax agents in script.py, tkv1.py and tkv6.py
+- book.py: perfect-play table for every position, built once into book.bin (`python book.py --force` rebuilds it) and memory-mapped by the minimax agents
+- bitboard.py: BitboardTicTacToe, a drop-in TicTacToe that keeps X and O as two 9-bit masks (used by the solver and the you-vs-AI front-ends), plus `canonicalize` for mapping a position onto one of its 8 rotations/reflections
+- train.py: headless Q-learning self-play (`python train.py --episodes 1000000`, add `--workers N` to spread it over N processes and `--symmetric` to share q-values between symmetric positions), checkpointing the Q-table to q_table.qtb, which tkv5.py and tkv6.py load at start-up
+- checkpoint.py: the q_table.qtb format, a small header followed by the float32 q-values of every live position; it is memory-mapped on load and long runs append only the changed q-values at each checkpoint
+- replay.py: ReplayBuffer, a NumPy ring buffer of transitions that trains a DenseQTable in vectorized batches, optionally prioritized by TD error (`python train.py --replay 50000 --prioritized`)
+- qtable.py: DenseQTable, a float32 array of q-values over every live position that can replace the dict Q-table (`python train.py --dense`)
+- batch.py: BatchTicTacToe, N boards stepped together with NumPy, and a round-robin tournament between the random, minimax, Q-greedy and hybrid agents (`python batch.py --games 100000`)
+- bench.py: timings for the engines, agents and self-play as JSON with medians and percentiles (`python bench.py --output base.json`, then `python bench.py --baseline base.json` flags regressions)
+- search.py: iterative-deepening alpha-beta SearchAgent with a per-move time budget, used by script.py and tkv1.py on bigger boards (`python tkv1.py --size 15 --win-length 5`)
+- mcts.py: MCTSAgent, a Monte Carlo tree search agent with a playout or time budget that keeps its tree between moves (`--agent mcts` in script.py and tkv1.py; `python mcts.py --size 9 --win-length 5 --time-ms 300` prints its search stats)
+- instrument.py: opt-in profiling hooks for the solver, book, search, MCTS, engine and agents (nodes, cache hit rates, depth, hybrid minimax fallbacks, per-move latency); `python instrument.py --agent hybrid --games 20 --trace trace.json --cprofile game{game}.prof` plays headless games with them enabled, and `--trace trace.json` does the same for script.py and tkv1.py
+- server.py: headless asyncio game server with many concurrent sessions over JSON lines on TCP or a Unix socket (`python server.py --port 8765`); AI moves come from a shared agent pool and move cache. loadtest.py plays thousands of random-move sessions against it and reports move latency (`python loadtest.py --sessions 1000`)
+- distill.py: compiles any agent into a frozen position -> move table by asking it for its move in every reachable 3 x 3 position (`python distill.py compile --agent hybrid hybrid.tbl`); TablePlayer plays from the memory-mapped table with one lookup per move, and `python distill.py diff a.tbl b.tbl` lists the positions where two compiled policies disagree
+- records.py: compact append-only game records (9 bytes per 3 x 3 game, written in bulk) and a streaming analysis of win rates per agent, openings and blunders checked against the book (`python records.py games.rec`); `--record games.rec` on script.py, tkv1.py, tkv5.py and tkv6.py writes the games played
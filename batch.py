@@ -0,0 +1,129 @@
+import argparse
+import time
+
+import numpy as np
+
+from bitboard import WIN_MASKS
+from book import BOOK
+from checkpoint import CHECKPOINT_PATH, load_q_table
+from qtable import LEGAL_PENALTY, ROWS, as_dense
+
+# LINES[:, k] has a 1 on every cell of win line k, so boards @ LINES is the line sums.
+LINES = np.array([[m >> i & 1 for m in WIN_MASKS] for i in range(9)], dtype=np.int8)
+POW3 = 3 ** np.arange(9)
+
+
+class BatchTicTacToe:
+    # N boards as one (N, 9) int8 array of 0 / 1 (X) / -1 (O), stepped together.
+    def __init__(self, n):
+        self.boards = np.zeros((n, 9), dtype=np.int8)
+
+    def reset(self):
+        self.boards.fill(0)
+        return self.boards
+
+    def legal_moves(self):
+        return self.boards == 0
+
+    def make_moves(self, moves, player, active=None):
+        rows = np.arange(len(self.boards)) if active is None else np.flatnonzero(active)
+        self.boards[rows, moves[rows]] = player
+
+    def winners(self):
+        # 1 / -1 for a finished game, 0 for a draw, 2 while still in play.
+        sums = self.boards.astype(np.int16) @ LINES
+        result = np.full(len(self.boards), 2, dtype=np.int8)
+        result[~(self.boards == 0).any(axis=1)] = 0
+        result[(sums == -3).any(axis=1)] = -1
+        result[(sums == 3).any(axis=1)] = 1
+        return result
+
+    def ternary_index(self):
+        # Base-3 index of each board (X digit 1, O digit 2), as used by the book and DenseQTable.
+        return np.where(self.boards == -1, 2, self.boards).astype(np.int64) @ POW3
+
+
+def random_policy(seed=None):
+    rng = np.random.default_rng(seed)
+
+    def policy(env, player):
+        return np.where(env.legal_moves(), rng.random(env.boards.shape), -1.0).argmax(axis=1)
+    return policy
+
+
+def book_policy(book=BOOK):
+    entries = np.frombuffer(book.entries, dtype=np.uint8)
+
+    def policy(env, player):
+        return entries[2 * env.ternary_index() + (player == -1)] >> 4
+    return policy
+
+
+def q_scores(table, env):
+    # Masked q-values per board; finished boards (no dense row) read as all 0.
+    rows = ROWS[env.ternary_index()]
+    values = np.where((rows >= 0)[:, None], table.values[np.maximum(rows, 0)], 0.0)
+    empty = (env.boards == 0) @ (1 << np.arange(9))
+    return values + LEGAL_PENALTY[empty]
+
+
+def q_policy(table):
+    def policy(env, player):
+        return q_scores(table, env).argmax(axis=1)
+    return policy
+
+
+def hybrid_policy(table, book=BOOK):
+    # HybridAgent without exploration: the best q-value move, or the book move
+    # when that q-value is exactly 0.
+    from_book = book_policy(book)
+
+    def policy(env, player):
+        scores = q_scores(table, env)
+        moves = scores.argmax(axis=1)
+        unsure = scores[np.arange(len(moves)), moves] == 0
+        moves[unsure] = from_book(env, player)[unsure]
+        return moves
+    return policy
+
+
+def play_games(policy_x, policy_o, n, first=1):
+    # Plays n games in lockstep and returns the array of results (1, -1 or 0).
+    env = BatchTicTacToe(n)
+    player = first
+    result = env.winners()
+    while (result == 2).any():
+        active = result == 2
+        policy = policy_x if player == 1 else policy_o
+        env.make_moves(policy(env, player).astype(np.intp), player, active)
+        result = env.winners()
+        player = -player
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized round-robin tournament between agents")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    table = as_dense(load_q_table(args.checkpoint))
+    policies = {
+        "random": random_policy(args.seed),
+        "minimax": book_policy(),
+        "q-greedy": q_policy(table),
+        "hybrid": hybrid_policy(table),
+    }
+    for name_x, policy_x in policies.items():
+        for name_o, policy_o in policies.items():
+            started = time.perf_counter()
+            result = play_games(policy_x, policy_o, args.games)
+            elapsed = time.perf_counter() - started
+            print(f"{name_x:>8} (X) vs {name_o:<8} (O): X {(result == 1).mean():6.1%}  "
+                  f"O {(result == -1).mean():6.1%}  draw {(result == 0).mean():6.1%}  "
+                  f"[{args.games / elapsed:,.0f} games/sec]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bitboard import BitboardTicTacToe
+from core import HeuristicAgent, HybridAgent, MinimaxAgent, QLearningAgent, TicTacToe
+from distill import TablePlayer, compile_table
+from solver import Solver
+
+MID_GAME = [((1, 1), 1), ((0, 0), -1), ((0, 2), 1)]
+
+
+def measure(func, repeat=50, number=None):
+    # Per-call time in microseconds for `repeat` samples of `number` calls each;
+    # number is picked so one sample takes roughly a millisecond.
+    if number is None:
+        number = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - started > 1e-3 or number >= 1 << 20:
+                break
+            number *= 2
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number * 1e6)
+    cuts = statistics.quantiles(samples, n=100)
+    return {"median_us": statistics.median(samples), "p90_us": cuts[89], "p99_us": cuts[98],
+            "min_us": min(samples), "calls": repeat * number}
+
+
+def setup_game(game):
+    for move, player in MID_GAME:
+        game.make_move(*move, player)
+    return game
+
+
+def engine_benchmarks():
+    results = {}
+    for name, game in (("numpy", setup_game(TicTacToe())), ("bitboard", setup_game(BitboardTicTacToe()))):
+        for method in ("check_winner", "available_moves", "get_state"):
+            results[f"engine.{name}.{method}"] = measure(getattr(game, method))
+    return results
+
+
+def agent_benchmarks():
+    results = {}
+    empty, mid = BitboardTicTacToe(), setup_game(BitboardTicTacToe())
+    booked = MinimaxAgent()
+    results["minimax.book.empty"] = measure(lambda: booked.best_move(empty, 1))
+    results["minimax.book.mid"] = measure(lambda: booked.best_move(mid, -1))
+    results["minimax.cold.empty"] = measure(lambda: MinimaxAgent(Solver()).best_move(empty, 1), repeat=10, number=1)
+    results["minimax.cold.mid"] = measure(lambda: MinimaxAgent(Solver()).best_move(mid, -1), repeat=20, number=1)
+    warm = MinimaxAgent(Solver())
+    warm.best_move(empty, 1)
+    results["minimax.warm.empty"] = measure(lambda: warm.best_move(empty, 1))
+
+    state = tuple(np.array(mid.board).flatten())
+    moves = mid.available_moves()
+    hybrid = HybridAgent(epsilon=0)
+    results["hybrid.best_action"] = measure(lambda: hybrid.best_action(state, moves, -1))
+    heuristic = HeuristicAgent(epsilon=0)
+    results["heuristic.best_action"] = measure(lambda: heuristic.best_action(state, moves, -1))
+    q_agent = QLearningAgent(epsilon=0)
+    results["qlearning.best_action"] = measure(lambda: q_agent.best_action(mid.get_state(), moves))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "hybrid.tbl")
+        compile_table(hybrid, path)
+        table = TablePlayer(path)
+        results["table.best_action"] = measure(lambda: table.best_action(mid.get_state(), moves, -1))
+        table.close()
+    return results
+
+
+def self_play_benchmarks(episodes=2000):
+    from train import play_episode
+    results = {}
+    for name, kwargs in (("dict", {}), ("dense", {"dense": True}), ("symmetric", {"symmetric": True})):
+        random.seed(0)
+        agent, game = QLearningAgent(**kwargs), BitboardTicTacToe()
+        for _ in range(episodes):  # warm the table so the timing is steady-state
+            play_episode(agent, game)
+        timing = measure(lambda: play_episode(agent, game), repeat=20)
+        timing["episodes_per_sec"] = 1e6 / timing["median_us"]
+        results[f"self_play.{name}"] = timing
+
+    from replay import ReplayBuffer
+    from train import use_replay
+    random.seed(0)
+    agent, game, replay = QLearningAgent(), BitboardTicTacToe(), ReplayBuffer(50000, seed=0)
+    use_replay(agent, replay)
+
+    def replay_round():  # train.py's default: one batch of 256 every 4 episodes
+        for _ in range(4):
+            play_episode(agent, game)
+        replay.learn(agent.q_table, 256, agent.alpha, agent.gamma)
+
+    for _ in range(episodes // 4):
+        replay_round()
+    timing = measure(replay_round, repeat=20)
+    timing["episodes_per_sec"] = 4e6 / timing["median_us"]
+    results["self_play.replay"] = timing
+    return results
+
+
+def startup_benchmarks(modules=("core", "server", "train", "script", "tkv1", "tkv5", "tkv6")):
+    # A fresh interpreter importing each module; "python" is the interpreter
+    # alone. Headless modules should stay close to it, since only the front-ends
+    # load pygame or tkinter.
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for module in ("python",) + modules:
+        code = "pass" if module == "python" else f"import {module}"
+        results[f"startup.{module}"] = measure(
+            lambda: subprocess.run([sys.executable, "-c", code], cwd=here, check=True, capture_output=True),
+            repeat=5, number=1)
+    return results
+
+
+SUITES = {"engine": engine_benchmarks, "agents": agent_benchmarks, "self_play": self_play_benchmarks,
+          "startup": startup_benchmarks}
+
+
+def compare(results, baseline, threshold):
+    # Prints the median ratio against the baseline; returns the regressed names.
+    regressions = []
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        ratio = timing["median_us"] / baseline[name]["median_us"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<32} {baseline[name]['median_us']:>12.2f} -> {timing['median_us']:>12.2f} us  x{ratio:.2f}{flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine, agents and self-play")
+    parser.add_argument("--suite", action="append", choices=list(SUITES), help="run only this suite (repeatable)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report to compare medians against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    for suite in args.suite or SUITES:
+        results.update(SUITES[suite]())
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
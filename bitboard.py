@@ -0,0 +1,268 @@
+import functools
+
+FULL = 0x1FF
+WIN_MASKS = [0b000000111, 0b000111000, 0b111000000,
+             0b001001001, 0b010010010, 0b100100100,
+             0b100010001, 0b001010100]
+# MOVES[empty_mask] lists the (row, col) of every set bit, so move generation is one lookup.
+MOVES = [tuple(divmod(i, 3) for i in range(9) if m >> i & 1) for m in range(512)]
+# TERNARY[mask] is the base-3 value with a 1 digit at every set bit.
+TERNARY = [sum(3 ** i for i in range(9) if m >> i & 1) for m in range(512)]
+# The 8 symmetries of the board (identity, 3 rotations, 4 reflections):
+# TRANSFORMS[t][i] is the cell that cell i moves to under transform t.
+TRANSFORMS = [[(f(r, c)[0] * 3 + f(r, c)[1]) for r in range(3) for c in range(3)] for f in (
+    lambda r, c: (r, c), lambda r, c: (c, 2 - r), lambda r, c: (2 - r, 2 - c), lambda r, c: (2 - c, r),
+    lambda r, c: (r, 2 - c), lambda r, c: (2 - r, c), lambda r, c: (c, r), lambda r, c: (2 - c, 2 - r))]
+INVERSE = [[t.index(i) for i in range(9)] for t in TRANSFORMS]
+TRANSFORM_MASKS = [[sum(1 << t[i] for i in range(9) if m >> i & 1) for m in range(512)] for t in TRANSFORMS]
+
+
+def encode(cells):
+    # State int for a flat 9-cell board: X mask in the low 9 bits, O mask above it.
+    state = 0
+    for i, v in enumerate(cells):
+        if v == 1:
+            state |= 1 << i
+        elif v == -1:
+            state |= 1 << (i + 9)
+    return state
+
+
+def decode(state):
+    return tuple(1 if state >> i & 1 else -1 if state >> (i + 9) & 1 else 0 for i in range(9))
+
+
+def masks(state):
+    return state & FULL, state >> 9
+
+
+def canonicalize(state):
+    # Smallest state over the 8 symmetries and the transform that produces it.
+    x, o = state & FULL, state >> 9
+    return min((m[x] | m[o] << 9, t) for t, m in enumerate(TRANSFORM_MASKS))
+
+
+def transform_state(state, transform):
+    m = TRANSFORM_MASKS[transform]
+    return m[state & FULL] | m[state >> 9] << 9
+
+
+def transform_move(move, transform):
+    return divmod(TRANSFORMS[transform][move[0] * 3 + move[1]], 3)
+
+
+def restore_move(move, transform):
+    # Inverse of transform_move: a move on the canonical board back to the original.
+    return divmod(INVERSE[transform][move[0] * 3 + move[1]], 3)
+
+
+def winner(x, o):
+    for m in WIN_MASKS:
+        if x & m == m:
+            return 1
+        if o & m == m:
+            return -1
+    if x | o == FULL:
+        return 0  # Draw
+    return None
+
+
+class Geometry:
+    # Line masks for a size x size board won by win_length in a row. Cell
+    # (row, col) is bit row * size + col; lines_through[cell] holds only the
+    # lines that contain the cell so a move can be checked on its own.
+    def __init__(self, size, win_length):
+        if not 1 <= win_length <= size:
+            raise ValueError(f"win_length must be between 1 and {size}, got {win_length}")
+        self.size = size
+        self.win_length = win_length
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+        self.coords = [divmod(i, size) for i in range(self.cells)]
+        self.lines = []
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for r in range(size):
+                for c in range(size):
+                    end_r, end_c = r + dr * (win_length - 1), c + dc * (win_length - 1)
+                    if 0 <= end_r < size and 0 <= end_c < size:
+                        self.lines.append(sum(1 << ((r + dr * i) * size + c + dc * i) for i in range(win_length)))
+        self.lines_through = [[m for m in self.lines if m >> i & 1] for i in range(self.cells)]
+        self.line_ids_through = [[k for k, m in enumerate(self.lines) if m >> i & 1] for i in range(self.cells)]
+        # Cells within two steps of each cell, used to keep searches on big boards near the stones.
+        self.neighbours = [sum(1 << (nr * size + nc)
+                               for nr in range(max(0, r - 2), min(size, r + 3))
+                               for nc in range(max(0, c - 2), min(size, c + 3)))
+                           for r in range(size) for c in range(size)]
+
+    def is_win(self, stones, cell):
+        return any(m & stones == m for m in self.lines_through[cell])
+
+    def winner(self, x, o):
+        for m in self.lines:
+            if x & m == m:
+                return 1
+            if o & m == m:
+                return -1
+        if x | o == self.full:
+            return 0  # Draw
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def geometry(size, win_length):
+    return Geometry(size, win_length)
+
+
+class BitboardTicTacToe:
+    # Drop-in for the numpy TicTacToe: same methods, but the position is two
+    # bit masks and get_state() is a single int. The board is size x size and
+    # won by win_length in a row (3 x 3, 3 in a row by default).
+    #
+    # make_move keeps a per-line stone count for each side and the result up
+    # to date from the lines through the move alone, and pushes the move on a
+    # history stack that undo_move pops, so searches can play and take back
+    # moves without rescanning or copying the board. Above 3 x 3 it also keeps
+    # the empty cells in a list, with slots[cell] the index of each one, so
+    # available_moves() costs the same however big the board is. A move swaps
+    # the last entry into the freed slot and undo_move swaps it back, so the
+    # order is unchanged across a make_move/undo_move pair. available_moves()
+    # returns that live list, not a copy: callers must not change it and must
+    # copy it to keep it past the next move. On 3 x 3 it returns a shared
+    # tuple from MOVES instead.
+    def __init__(self, size=3, win_length=None):
+        self.geometry = geometry(size, win_length or min(size, 5))
+        self.size = size
+        self.win_length = self.geometry.win_length
+        self.reset()
+
+    @property
+    def board(self):
+        import numpy as np  # only the GUIs need the array, so headless use skips NumPy
+        return np.array([1 if self.x >> i & 1 else -1 if self.o >> i & 1 else 0
+                         for i in range(self.geometry.cells)], dtype=int).reshape((self.size, self.size))
+
+    def reset(self):
+        self.x = 0
+        self.o = 0
+        self.result = None
+        self.x_counts = [0] * len(self.geometry.lines)
+        self.o_counts = [0] * len(self.geometry.lines)
+        self.history = []
+        if self.size != 3:
+            self.empty = self.geometry.coords[:]
+            self.slots = list(range(self.geometry.cells))
+        return self.get_state()
+
+    def get_state(self):
+        return self.x | self.o << self.geometry.cells
+
+    def set_state(self, state):
+        # Loads a get_state() int or a flat sequence of cells; the history starts empty.
+        self.reset()
+        cells = self.geometry.cells
+        if isinstance(state, int):
+            state = [1 if state >> i & 1 else -1 if state >> (i + cells) & 1 else 0 for i in range(cells)]
+        for i, v in enumerate(state):
+            if v:
+                self.make_move(*divmod(i, self.size), int(v))
+        self.history = []
+
+    def copy(self):
+        game = BitboardTicTacToe(self.size, self.win_length)
+        game.x, game.o, game.result = self.x, self.o, self.result
+        game.x_counts, game.o_counts = self.x_counts[:], self.o_counts[:]
+        game.history = self.history[:]
+        if self.size != 3:
+            game.empty, game.slots = self.empty[:], self.slots[:]
+        return game
+
+    def available_moves(self):
+        if self.size == 3:
+            return MOVES[FULL & ~(self.x | self.o)]
+        return self.empty
+
+    def make_move(self, row, col, player):
+        cell = row * self.size + col
+        bit = 1 << cell
+        if (self.x | self.o) & bit:
+            self.clear(cell)
+        if player == 0:
+            # Clearing a cell can undo a win anywhere, so rescan the counters.
+            k = self.win_length
+            if any(n == k for n in self.x_counts):
+                self.result = 1
+            elif any(n == k for n in self.o_counts):
+                self.result = -1
+            else:
+                self.result = None
+            return
+        self.history.append((cell, player, self.result))
+        if self.size != 3:
+            empty, slots = self.empty, self.slots
+            last = empty.pop()
+            i = slots[cell]
+            if i < len(empty):
+                empty[i] = last
+                slots[last[0] * self.size + last[1]] = i
+        counts = self.x_counts if player == 1 else self.o_counts
+        won = False
+        for line in self.geometry.line_ids_through[cell]:
+            counts[line] += 1
+            if counts[line] == self.win_length:
+                won = True
+        if player == 1:
+            self.x |= bit
+        else:
+            self.o |= bit
+        if won:
+            self.result = player
+        elif self.result is None and self.x | self.o == self.geometry.full:
+            self.result = 0  # Draw
+
+    def undo_move(self):
+        cell, player, result = self.history.pop()
+        self.clear(cell)
+        self.result = result
+        return divmod(cell, self.size)
+
+    def clear(self, cell):
+        bit = 1 << cell
+        if self.x & bit:
+            self.x &= ~bit
+            counts = self.x_counts
+        else:
+            self.o &= ~bit
+            counts = self.o_counts
+        for line in self.geometry.line_ids_through[cell]:
+            counts[line] -= 1
+        if self.size != 3:
+            # Back into its old slot when that is still free (always after a
+            # make_move), moving the entry there to the end.
+            empty, slots = self.empty, self.slots
+            i = slots[cell]
+            if i < len(empty):
+                moved = empty[i]
+                slots[moved[0] * self.size + moved[1]] = len(empty)
+                empty.append(moved)
+                empty[i] = self.geometry.coords[cell]
+            else:
+                slots[cell] = len(empty)
+                empty.append(self.geometry.coords[cell])
+
+    def check_winner(self):
+        return self.result
+
+    def wins_with(self, row, col, player):
+        # Whether playing the empty cell (row, col) completes a line for player.
+        counts = self.x_counts if player == 1 else self.o_counts
+        k = self.win_length - 1
+        return any(counts[line] == k for line in self.geometry.line_ids_through[row * self.size + col])
+
+    def open_lines(self, player, stones):
+        # Lines holding exactly `stones` of player's pieces and none of the opponent's.
+        own, other = (self.x_counts, self.o_counts) if player == 1 else (self.o_counts, self.x_counts)
+        return sum(1 for a, b in zip(own, other) if a == stones and b == 0)
+
+    def canonical_state(self):
+        # Symmetries are only defined for the 3 x 3 board.
+        return canonicalize(self.get_state())
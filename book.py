@@ -0,0 +1,103 @@
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from bitboard import TERNARY, masks
+from solver import Solver
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+BOOK_MAGIC = b"TTTB"
+BOOK_VERSION = 1
+HEADER = struct.Struct("<4sHI")  # magic, version, crc32 of the entries
+NUM_ENTRIES = 2 * 3 ** 9
+NO_MOVE = 15
+
+
+def position_index(state, player):
+    # Base-3 digits of the board (empty 0, X 1, O 2) and the side to move in the low bit.
+    x, o = masks(state)
+    return 2 * (TERNARY[x] + 2 * TERNARY[o]) + (player == -1)
+
+
+def encode_entry(score, move):
+    # High nibble is the best move (NO_MOVE when the game is over), low nibble the
+    # negamax score offset by 8. A zero byte marks an unreachable position.
+    return ((NO_MOVE if move is None else move) << 4) | (score + 8)
+
+
+class Book:
+    def __init__(self, entries, mm=None):
+        self.entries = entries
+        self.mm = mm
+
+    def lookup(self, state, player):
+        entry = self.entries[position_index(state, player)]
+        if entry == 0:
+            return None
+        move = entry >> 4
+        return (entry & 0xF) - 8, None if move == NO_MOVE else divmod(move, 3)
+
+    def close(self):
+        if self.mm is not None:
+            self.entries.release()
+            self.mm.close()
+            self.mm = None
+
+
+def build_entries():
+    solver = Solver()
+    entries = bytearray(NUM_ENTRIES)
+    for state, player in solver.solve():
+        move = solver.best_move(state, player)
+        entries[position_index(state, player)] = encode_entry(
+            solver.value(state, player), None if move is None else move[0] * 3 + move[1])
+    return bytes(entries)
+
+
+def write_book(path=BOOK_PATH):
+    entries = build_entries()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, zlib.crc32(entries)))
+        f.write(entries)
+    os.replace(tmp, path)
+    return entries
+
+
+def load_book(path=BOOK_PATH):
+    # Returns None when the file is missing, from another version or corrupt.
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mm) == HEADER.size + NUM_ENTRIES:
+        magic, version, checksum = HEADER.unpack_from(mm)
+        entries = memoryview(mm)[HEADER.size:]
+        if magic == BOOK_MAGIC and version == BOOK_VERSION and zlib.crc32(entries) == checksum:
+            return Book(entries, mm)
+        entries.release()
+    mm.close()
+    return None
+
+
+def open_book(path=BOOK_PATH):
+    book = load_book(path)
+    if book is not None:
+        return book
+    try:
+        write_book(path)
+    except OSError:
+        return Book(build_entries())
+    return load_book(path) or Book(build_entries())
+
+
+BOOK = open_book()
+SOLVER = Solver(book=BOOK)
+
+if __name__ == "__main__":
+    if "--force" in sys.argv[1:] or load_book() is None:
+        write_book()
+    print(f"{BOOK_PATH}: {NUM_ENTRIES} entries, version {BOOK_VERSION}")
@@ -0,0 +1,141 @@
+import os
+import struct
+
+import numpy as np
+
+from bitboard import TRANSFORMS, transform_move, transform_state
+from qtable import NUM_ROWS, DenseQTable, as_dense
+
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "q_table.qtb")
+CHECKPOINT_MAGIC = b"TTTQ"
+CHECKPOINT_VERSION = 1
+SYMMETRIC = 1
+# magic, version, flags, rows, actions per row, episodes. The rows are the
+# DenseQTable rows (live positions in base-3 order), so NUM_ROWS doubles as the
+# check that file and code agree on the state-index encoding.
+HEADER = struct.Struct("<4sHHIIQ")
+# After the header: float32 values[rows, 9], then the visited flags as one byte
+# each. Incremental saves append batches of (row, action, value) records behind
+# them, each batch led by its record count and the episode count it brings the
+# table up to.
+BATCH = struct.Struct("<4sIQ")
+BATCH_MAGIC = b"QLOG"
+RECORD = np.dtype([("row", "<u4"), ("action", "u1"), ("value", "<f4")])
+
+
+def base_size(rows=NUM_ROWS):
+    return HEADER.size + rows * 9 * (4 + 1)
+
+
+def read_batches(f, rows=NUM_ROWS):
+    # Yields (records, episodes, end offset) for each complete, in-range batch
+    # after the table in the open checkpoint f, stopping at the first one that
+    # is torn or corrupt.
+    end = base_size(rows)
+    f.seek(end)
+    while True:
+        head = f.read(BATCH.size)
+        if len(head) < BATCH.size:
+            return
+        magic, count, episodes = BATCH.unpack(head)
+        data = f.read(count * RECORD.itemsize)
+        if magic != BATCH_MAGIC or len(data) < count * RECORD.itemsize:
+            return  # torn write at the end of an interrupted save
+        records = np.frombuffer(data, dtype=RECORD)
+        if count and (records["row"].max() >= rows or records["action"].max() >= 9):
+            return
+        end += BATCH.size + len(data)
+        yield records, episodes, end
+
+
+def save_q_table(q_table, path=CHECKPOINT_PATH, episodes=0, symmetric=False):
+    # Writes the whole table, replacing any appended batches.
+    table = as_dense(q_table)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, SYMMETRIC if symmetric else 0, NUM_ROWS, 9, episodes))
+        f.write(np.ascontiguousarray(table.values, dtype="<f4").tobytes())
+        f.write(np.ascontiguousarray(table.visited, dtype=np.uint8).tobytes())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    # The values and visited flags are memory-mapped copy-on-write, so start-up
+    # reads only the pages that get used and updates never reach the file.
+    if not os.path.exists(path):
+        return {"q_table": DenseQTable(), "episodes": 0, "symmetric": False, "size": 0}
+    with open(path, "rb") as f:
+        magic, version, flags, rows, actions, episodes = HEADER.unpack(f.read(HEADER.size))
+        if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} Q-table checkpoint")
+        if rows != NUM_ROWS or actions != 9:
+            raise ValueError(f"{path} has {rows}x{actions} q-values, expected {NUM_ROWS}x9")
+        table = DenseQTable.__new__(DenseQTable)
+        table.__setstate__({
+            "values": np.memmap(path, dtype="<f4", mode="c", offset=HEADER.size, shape=(rows, 9)),
+            "visited": np.memmap(path, dtype=np.bool_, mode="c", offset=HEADER.size + rows * 9 * 4, shape=(rows, 9)),
+        })
+        size = base_size(rows)
+        for records, episodes, size in read_batches(f, rows):
+            table.values[records["row"], records["action"]] = records["value"]
+            table.visited[records["row"], records["action"]] = True
+    # size is the end of the last batch applied; anything after it is ignored.
+    return {"q_table": table, "episodes": episodes, "symmetric": bool(flags & SYMMETRIC), "size": size}
+
+
+class CheckpointWriter:
+    # Saves one training run. The first save writes the whole table; later ones
+    # append only the q-values that changed since the previous save, and the
+    # file is rewritten once the appended batches outgrow the table itself.
+    # Pass the table a run resumed from as base to append to its checkpoint;
+    # a torn or corrupt tail left by an interrupted save is cut off first, so
+    # the new batches follow the last one load_checkpoint applied.
+    def __init__(self, path=CHECKPOINT_PATH, symmetric=False, base=None):
+        self.path = path
+        self.symmetric = symmetric
+        self.values = self.visited = None
+        if base is not None and path and os.path.exists(path):
+            base = as_dense(base)
+            self.values, self.visited = np.array(base.values), np.array(base.visited)
+            with open(path, "r+b") as f:
+                end = base_size()
+                for _, _, end in read_batches(f):
+                    pass
+                if f.seek(0, os.SEEK_END) > end:
+                    f.truncate(end)
+            self.log_size = end - base_size()
+
+    def save(self, q_table, episodes):
+        table = as_dense(q_table)
+        if self.values is None or self.log_size > base_size():
+            save_q_table(table, self.path, episodes, self.symmetric)
+            self.values, self.visited = np.array(table.values), np.array(table.visited)
+            self.log_size = 0
+            return
+        changed = (table.values != self.values) | (table.visited != self.visited)
+        rows, actions = np.nonzero(changed)
+        records = np.empty(len(rows), dtype=RECORD)
+        records["row"], records["action"], records["value"] = rows, actions, table.values[rows, actions]
+        with open(self.path, "ab") as f:
+            f.write(BATCH.pack(BATCH_MAGIC, len(records), episodes) + records.tobytes())
+        self.values[changed] = table.values[changed]
+        self.visited[changed] = True
+        self.log_size += BATCH.size + records.nbytes
+
+
+def expand_symmetric(q_table):
+    # A table trained with symmetric=True only holds canonical positions; give
+    # every symmetric copy its own entry for agents that look up raw states.
+    expanded = type(q_table)()
+    for (state, action), q in q_table.items():
+        for transform in range(len(TRANSFORMS)):
+            expanded[(transform_state(state, transform), transform_move(action, transform))] = q
+    return expanded
+
+
+def load_q_table(path=CHECKPOINT_PATH):
+    saved = load_checkpoint(path)
+    q_table = saved["q_table"]
+    if saved["symmetric"]:
+        q_table = expand_symmetric(q_table)
+    return q_table
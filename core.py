@@ -0,0 +1,182 @@
+import random
+
+from bitboard import FULL, MOVES, BitboardTicTacToe, canonicalize, encode, masks, restore_move, transform_move
+from book import SOLVER
+from search import SearchAgent
+
+# The engines and agents shared by the front-ends and the headless tools, with
+# no GUI dependency. NumPy and the DenseQTable are only imported when used.
+
+
+class TicTacToe:
+    # The original NumPy engine, kept as a reference for bitboard.py.
+    def __init__(self):
+        import numpy as np
+        self.board = np.zeros((3, 3), dtype=int)
+
+    def reset(self):
+        self.board.fill(0)
+        return self.get_state()
+
+    def get_state(self):
+        return tuple(self.board.flatten())
+
+    def available_moves(self):
+        return [(r, c) for r in range(3) for c in range(3) if self.board[r, c] == 0]
+
+    def make_move(self, row, col, player):
+        self.board[row, col] = player
+
+    def check_winner(self):
+        import numpy as np
+        for i in range(3):
+            if abs(sum(self.board[i, :])) == 3:
+                return np.sign(sum(self.board[i, :]))
+            if abs(sum(self.board[:, i])) == 3:
+                return np.sign(sum(self.board[:, i]))
+        if abs(sum([self.board[i, i] for i in range(3)])) == 3:
+            return np.sign(sum([self.board[i, i] for i in range(3)]))
+        if abs(sum([self.board[i, 2 - i] for i in range(3)])) == 3:
+            return np.sign(sum([self.board[i, 2 - i]]))
+        if len(self.available_moves()) == 0:
+            return 0  # Draw
+        return None
+
+
+class QLearningAgent:
+    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1, dense=False, symmetric=False):
+        if dense:
+            from qtable import DenseQTable
+            self.q_table = DenseQTable()
+        else:
+            self.q_table = {}
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        # Key the table by the canonical state and move so all 8 symmetric
+        # copies of a position share their q-values.
+        self.symmetric = symmetric
+
+    def canonical(self, state, action=None):
+        state, transform = canonicalize(state if isinstance(state, int) else encode(state))
+        return state, None if action is None else transform_move(action, transform), transform
+
+    def get_q_value(self, state, action):
+        if self.symmetric:
+            state, action, _ = self.canonical(state, action)
+        return self.q_table.get((state, action), 0.0)
+
+    def best_action(self, state, available_moves):
+        if random.random() < self.epsilon:
+            return random.choice(available_moves)
+        if not isinstance(self.q_table, dict):  # DenseQTable
+            if self.symmetric:
+                state, _, transform = self.canonical(state)
+                return restore_move(self.q_table.best_action(state), transform)
+            return self.q_table.best_action(state)
+        if self.symmetric:
+            canonical, _, transform = self.canonical(state)
+            q_values = {move: self.q_table.get((canonical, transform_move(move, transform)), 0.0) for move in available_moves}
+        else:
+            q_values = {move: self.get_q_value(state, move) for move in available_moves}
+        return max(q_values, key=q_values.get)
+
+    def update_q_value(self, state, action, reward, next_state):
+        if self.symmetric:
+            state, action, _ = self.canonical(state, action)
+            next_state = self.canonical(next_state)[0]
+        if not isinstance(self.q_table, dict):
+            max_future_q = self.q_table.max_value(next_state)
+        else:
+            x, o = masks(next_state if isinstance(next_state, int) else encode(next_state))
+            max_future_q = max([self.q_table.get((next_state, move), 0.0) for move in MOVES[FULL & ~(x | o)]], default=0)
+        self.q_table[(state, action)] = (1 - self.alpha) * self.q_table.get((state, action), 0.0) + self.alpha * (reward + self.gamma * max_future_q)
+
+
+class MinimaxAgent:
+    # Perfect play from the solver on the classic board; larger boards use a
+    # time-limited iterative-deepening search instead.
+    def __init__(self, solver=SOLVER, time_limit=1.0):
+        self.solver = solver
+        self.search = SearchAgent(time_limit)
+
+    def best_move(self, game, player=-1):
+        if getattr(game, "size", 3) == 3 and getattr(game, "win_length", 3) == 3:
+            return self.solver.best_move(game.get_state(), player)
+        return self.search.best_move(game, player)
+
+
+class HeuristicAgent:
+    # tkv5's agent: win, block, centre and fork heuristics before the q-values.
+    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1):
+        self.q_table = {}
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.scratch = BitboardTicTacToe()
+
+    def get_q_value(self, state, action):
+        return self.q_table.get((state, action), 0.0)
+
+    def best_action(self, state, available_moves, player):
+        if random.random() < self.epsilon:
+            return random.choice(available_moves) if available_moves else None
+
+        # The heuristics below play and take back candidate moves on one
+        # reusable engine, whose line counters answer each check directly.
+        game = self.scratch
+        game.set_state(state)
+
+        # Check for a winning move
+        for move in available_moves:
+            if game.wins_with(*move, player):
+                return move
+
+        # Check for a blocking move
+        opponent = -player
+        for move in available_moves:
+            if game.wins_with(*move, opponent):
+                return move
+
+        # Prioritize center if available
+        if (1, 1) in available_moves:
+            return (1, 1)
+
+        # Try to create a fork move
+        for move in available_moves:
+            game.make_move(*move, player)
+            forks = game.open_lines(player, game.win_length - 1)
+            game.undo_move()
+            if forks > 1:
+                return move
+
+        # Otherwise, pick the best Q-value move
+        q_values = {move: self.get_q_value(state, move) for move in available_moves}
+        return max(q_values, key=q_values.get, default=None)
+
+
+class HybridAgent:
+    # tkv6's agent: the best q-value move, or the solver's move when that q-value is 0.
+    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1):
+        self.q_table = {}
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.solver = SOLVER
+
+    def get_q_value(self, state, action):
+        return self.q_table.get((state, action), 0.0)
+
+    def best_action(self, state, available_moves, player):
+        if random.random() < self.epsilon:
+            return random.choice(available_moves) if available_moves else None
+
+        q_values = {move: self.get_q_value(state, move) for move in available_moves}
+        best_q_move = max(q_values, key=q_values.get, default=None)
+
+        if best_q_move is None or q_values[best_q_move] == 0:
+            return self.minimax_move(state, player)
+        return best_q_move
+
+    def minimax_move(self, state, player):
+        return self.solver.best_move(state, player)
@@ -0,0 +1,142 @@
+import argparse
+import mmap
+import os
+import zlib
+
+from bitboard import BitboardTicTacToe, encode
+from book import BOOK, HEADER, NO_MOVE, NUM_ENTRIES, position_index
+from core import HeuristicAgent, HybridAgent, MinimaxAgent, QLearningAgent
+from mcts import MCTSAgent
+
+TABLE_MAGIC = b"TTTP"
+TABLE_VERSION = 1
+# Same layout as book.bin: a HEADER (magic, version, crc32) and one byte per
+# (position, side to move) at book.position_index, holding the chosen cell or
+# NO_MOVE where the position is unreachable or finished.
+CELLS = [divmod(i, 3) for i in range(9)] + [None] * 7
+
+
+def positions():
+    # Every reachable 3 x 3 position with a move to make, either side starting,
+    # as (index, state, player), taken from the book.
+    for index in range(NUM_ENTRIES):
+        entry = BOOK.entries[index]
+        if entry and entry >> 4 != NO_MOVE:
+            ternary, side = divmod(index, 2)
+            cells = []
+            for _ in range(9):
+                ternary, digit = divmod(ternary, 3)
+                cells.append((0, 1, -1)[digit])
+            yield index, encode(cells), -1 if side else 1
+
+
+def choose(agent, state, player):
+    game = BitboardTicTacToe()
+    game.set_state(state)
+    if hasattr(agent, "best_move"):
+        return agent.best_move(game, player)
+    if isinstance(agent, QLearningAgent):
+        return agent.best_action(state, game.available_moves())
+    return agent.best_action(state, game.available_moves(), player)
+
+
+def compile_table(agent, path):
+    # Asks agent for its move in every position with exploration switched off
+    # and writes the answers as a table file. Returns the number of positions.
+    epsilon = getattr(agent, "epsilon", None)
+    if epsilon is not None:
+        agent.epsilon = 0
+    entries = bytearray([NO_MOVE]) * NUM_ENTRIES
+    count = 0
+    try:
+        for index, state, player in positions():
+            move = choose(agent, state, player)
+            if move is not None:
+                entries[index] = move[0] * 3 + move[1]
+            count += 1
+    finally:
+        if epsilon is not None:
+            agent.epsilon = epsilon
+    # The same agent always compiles to the same bytes, so tables can be
+    # compared with cmp or diff() below.
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(TABLE_MAGIC, TABLE_VERSION, zlib.crc32(entries)))
+        f.write(entries)
+    os.replace(path + ".tmp", path)
+    return count
+
+
+class TablePlayer:
+    # Plays from a compiled table: one memory-mapped byte per position, so a
+    # move is a single lookup whatever agent the table was compiled from.
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, checksum = HEADER.unpack_from(self.mm)
+        self.entries = memoryview(self.mm)[HEADER.size:]
+        if (magic != TABLE_MAGIC or version != TABLE_VERSION or len(self.entries) != NUM_ENTRIES
+                or zlib.crc32(self.entries) != checksum):
+            self.close()
+            raise ValueError(f"{path} is not a version {TABLE_VERSION} policy table")
+
+    def best_move(self, game, player=-1):
+        return CELLS[self.entries[position_index(game.get_state(), player)]]
+
+    def best_action(self, state, available_moves, player):
+        if not isinstance(state, int):
+            state = encode(state)
+        return CELLS[self.entries[position_index(state, player)]]
+
+    def close(self):
+        if self.mm is not None:
+            self.entries.release()
+            self.mm.close()
+            self.mm = None
+
+
+def make_agent(name, checkpoint=None, playouts=2000, seed=0):
+    if name == "minimax":
+        return MinimaxAgent()
+    if name == "mcts":
+        return MCTSAgent(playouts=playouts, seed=seed)
+    from checkpoint import CHECKPOINT_PATH, load_q_table
+    agent = {"heuristic": HeuristicAgent, "hybrid": HybridAgent, "qlearning": QLearningAgent}[name]()
+    agent.q_table = load_q_table(checkpoint or CHECKPOINT_PATH)
+    return agent
+
+
+def diff(path_a, path_b, limit=20):
+    from records import board_text
+    a, b = TablePlayer(path_a), TablePlayer(path_b)
+    differences = [(index, a.entries[index], b.entries[index]) for index in range(NUM_ENTRIES)
+                   if a.entries[index] != b.entries[index]]
+    for index, move_a, move_b in differences[:limit]:
+        print(f"  {board_text(index // 2)}  {'O' if index & 1 else 'X'} to move: {CELLS[move_a]} vs {CELLS[move_b]}")
+    print(f"{len(differences)} positions differ")
+    a.close()
+    b.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile an agent into a position -> move table, or diff two tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("compile", help="evaluate an agent in every reachable position")
+    build.add_argument("--agent", choices=["minimax", "mcts", "heuristic", "hybrid", "qlearning"], required=True)
+    build.add_argument("--checkpoint", help="Q-table for the heuristic, hybrid and qlearning agents (default: q_table.qtb)")
+    build.add_argument("--playouts", type=int, default=2000, help="MCTS playouts per position")
+    build.add_argument("--seed", type=int, default=0, help="seeds the MCTS playouts")
+    build.add_argument("output")
+    compare = commands.add_parser("diff", help="list the positions where two tables choose differently")
+    compare.add_argument("a")
+    compare.add_argument("b")
+    compare.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    if args.command == "diff":
+        diff(args.a, args.b, args.limit)
+        return
+    count = compile_table(make_agent(args.agent, args.checkpoint, args.playouts, args.seed), args.output)
+    print(f"{args.output}: {args.agent} moves for {count} positions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import argparse
+import cProfile
+import functools
+import json
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+from bitboard import BitboardTicTacToe
+from book import Book
+from core import HybridAgent, MinimaxAgent
+from mcts import MCTSAgent
+from search import SearchAgent
+from solver import Solver
+
+# Methods timed on every class passed to enable(). Agent moves also become
+# events in the JSON trace; engine calls are too many, so they are only timed.
+AGENT_METHODS = ("best_move", "best_action", "minimax_move")
+ENGINE_METHODS = ("check_winner", "available_moves")
+
+
+class Stats:
+    # Counters, peak values and per-method latency collected while the hooks
+    # are enabled, plus one trace event per agent move.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counters = Counter()
+        self.peaks = {}
+        self.timings = {}
+        self.events = []
+        self.depth = 0
+        self.game = 0
+        self.started = time.perf_counter()
+
+    def peak(self, name, value):
+        if value > self.peaks.get(name, 0):
+            self.peaks[name] = value
+
+    def record(self, name, started, ended, trace):
+        calls, total, longest = self.timings.get(name, (0, 0.0, 0.0))
+        self.timings[name] = (calls + 1, total + ended - started, max(longest, ended - started))
+        if trace:
+            self.events.append({"name": name, "ph": "X", "pid": 0, "tid": self.game,
+                                "ts": (started - self.started) * 1e6, "dur": (ended - started) * 1e6})
+
+    def snapshot(self):
+        counters = self.counters
+        rates = {}
+        for prefix in ("solver", "search", "book"):
+            lookups = counters[f"{prefix}.cache_hits"] + counters[f"{prefix}.cache_misses"]
+            if lookups:
+                rates[f"{prefix}.cache_hit_rate"] = counters[f"{prefix}.cache_hits"] / lookups
+        # HybridAgent falls back to minimax when the best q-value is exactly 0;
+        # every other move came from the Q-table or exploration.
+        hybrid = self.timings.get("HybridAgent.best_action", (0,))[0]
+        if hybrid:
+            rates["hybrid.minimax_fallback_rate"] = counters["hybrid.minimax_fallback"] / hybrid
+        latency = {name: {"calls": calls, "total_ms": total * 1e3, "mean_us": total / calls * 1e6,
+                          "max_us": longest * 1e6}
+                   for name, (calls, total, longest) in sorted(self.timings.items())}
+        return {"counters": dict(sorted(counters.items())), "peaks": dict(sorted(self.peaks.items())),
+                "rates": rates, "latency": latency}
+
+    def dump_trace(self, path):
+        # Chrome trace event format: load it in chrome://tracing or Perfetto,
+        # one row per game.
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "otherData": self.snapshot()}, f)
+
+
+STATS = Stats()
+
+
+class CountingTable(dict):
+    # Transposition table that counts get() hits and misses under prefix.
+    def __init__(self, table, prefix):
+        super().__init__(table)
+        self.prefix = prefix
+
+    def get(self, key, default=None):
+        value = dict.get(self, key, default)
+        STATS.counters[f"{self.prefix}.cache_hits" if value is not None else f"{self.prefix}.cache_misses"] += 1
+        return value
+
+
+_patched = []
+_watched = []
+
+
+def watch_table(owner, prefix):
+    if type(owner.table) is dict:
+        owner.table = CountingTable(owner.table, prefix)
+        _watched.append(owner)
+
+
+def timed(name, trace):
+    def wrap(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STATS.record(name, started, time.perf_counter(), trace)
+        return wrapper
+    return wrap
+
+
+def count_nodes(negamax):
+    @functools.wraps(negamax)
+    def wrapper(self, *args, **kwargs):
+        watch_table(self, "solver")
+        STATS.counters["solver.nodes"] += 1
+        STATS.depth += 1
+        STATS.peak("solver.depth", STATS.depth)
+        try:
+            return negamax(self, *args, **kwargs)
+        finally:
+            STATS.depth -= 1
+    return wrapper
+
+
+def count_lookups(lookup):
+    @functools.wraps(lookup)
+    def wrapper(self, state, player):
+        entry = lookup(self, state, player)
+        STATS.counters["book.cache_hits" if entry is not None else "book.cache_misses"] += 1
+        return entry
+    return wrapper
+
+
+def count_search(best_move):
+    @functools.wraps(best_move)
+    def wrapper(self, game, player=-1):
+        watch_table(self, "search")
+        move = best_move(self, game, player)
+        STATS.counters["search.nodes"] += self.nodes
+        STATS.peak("search.depth", self.depth)
+        return move
+    return wrapper
+
+
+def count_playouts(best_move):
+    @functools.wraps(best_move)
+    def wrapper(self, game, player=-1):
+        move = best_move(self, game, player)
+        STATS.counters["mcts.playouts"] += self.stats.get("playouts", 0)
+        STATS.peak("mcts.tree_size", self.stats.get("tree_size", 0))
+        return move
+    return wrapper
+
+
+def count_fallback(minimax_move):
+    @functools.wraps(minimax_move)
+    def wrapper(self, *args, **kwargs):
+        STATS.counters["hybrid.minimax_fallback"] += 1
+        return minimax_move(self, *args, **kwargs)
+    return wrapper
+
+
+def patch(owner, name, wrap):
+    original = owner.__dict__[name]
+    setattr(owner, name, wrap(original))
+    _patched.append((owner, name, original))
+
+
+def enable(*classes):
+    # Wraps the hot paths of the solver, book, search, MCTS and bitboard engine,
+    # and the agent and engine methods of any extra classes (the front-end
+    # MinimaxAgent, HybridAgent, ...). Nothing is wrapped until this is called,
+    # so the hooks cost nothing when disabled.
+    if _patched:
+        return
+    patch(Solver, "negamax", count_nodes)
+    patch(Book, "lookup", count_lookups)
+    patch(SearchAgent, "best_move", count_search)
+    patch(MCTSAgent, "best_move", count_playouts)
+    # dict.fromkeys drops repeats, so a class passed in again is not timed twice.
+    for cls in dict.fromkeys((BitboardTicTacToe, SearchAgent, MCTSAgent) + classes):
+        if "minimax_move" in cls.__dict__:
+            patch(cls, "minimax_move", count_fallback)
+        for methods, trace in ((AGENT_METHODS, True), (ENGINE_METHODS, False)):
+            for method in methods:
+                if method in cls.__dict__:
+                    patch(cls, method, timed(f"{cls.__name__}.{method}", trace))
+
+
+def disable():
+    while _patched:
+        owner, name, original = _patched.pop()
+        setattr(owner, name, original)
+    while _watched:
+        owner = _watched.pop()
+        owner.table = dict(owner.table)
+
+
+@contextmanager
+def profiled(path):
+    # cProfile the block into path; open it with snakeviz, or flameprof for a
+    # flame graph.
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def make_agent(name, time_limit):
+    if name == "minimax":
+        return MinimaxAgent, MinimaxAgent(time_limit=time_limit)
+    if name == "cold":
+        return MinimaxAgent, MinimaxAgent(Solver(), time_limit)
+    if name == "hybrid":
+        from checkpoint import load_q_table
+        agent = HybridAgent()
+        agent.q_table = load_q_table()
+        return HybridAgent, agent
+    if name == "search":
+        return SearchAgent, SearchAgent(time_limit)
+    return MCTSAgent, MCTSAgent(time_ms=time_limit * 1000)
+
+
+def play(agent, game):
+    player = 1
+    while game.check_winner() is None:
+        if hasattr(agent, "best_move"):
+            move = agent.best_move(game, player)
+        else:
+            move = agent.best_action(game.get_state(), game.available_moves(), player)
+        game.make_move(*move, player)
+        player = -player
+    return game.check_winner()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play with the profiling hooks enabled")
+    parser.add_argument("--agent", choices=["minimax", "cold", "hybrid", "search", "mcts"], default="minimax",
+                        help="cold is minimax with a fresh solver and no book")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--win-length", type=int, default=None)
+    parser.add_argument("--time-limit", type=float, default=0.1, help="seconds per move for search and mcts")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--trace", help="write a Chrome trace of every move here")
+    parser.add_argument("--cprofile", help="write cProfile stats here; {game} in the name gives one file per game")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    cls, agent = make_agent(args.agent, args.time_limit)
+    enable(cls)
+    per_game = bool(args.cprofile) and "{game}" in args.cprofile
+    results = Counter()
+    with profiled(args.cprofile) if args.cprofile and not per_game else nullcontext():
+        for game_index in range(args.games):
+            STATS.game = game_index
+            game = BitboardTicTacToe(args.size, args.win_length)
+            with profiled(args.cprofile.format(game=game_index)) if per_game else nullcontext():
+                results[play(agent, game)] += 1
+    disable()
+    if args.trace:
+        STATS.dump_trace(args.trace)
+    print(json.dumps({"results": {"X": results[1], "O": results[-1], "draw": results[0]}, **STATS.snapshot()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
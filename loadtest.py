@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+
+
+class Client:
+    # Talks to server.py over one connection. request() can be awaited from
+    # many tasks at once; replies are matched to requests by their id.
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count()
+        self.waiting = {}
+        self.listener = asyncio.create_task(self.listen())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765, unix=None):
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix, limit=1 << 20)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+        return cls(reader, writer)
+
+    async def listen(self):
+        while line := await self.reader.readline():
+            response = json.loads(line)
+            future = self.waiting.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self.waiting.values():
+            future.set_exception(ConnectionError("server closed the connection"))
+
+    async def request(self, op, **fields):
+        request_id = next(self.ids)
+        future = self.waiting[request_id] = asyncio.get_running_loop().create_future()
+        self.writer.write(json.dumps({"op": op, "id": request_id, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.listener
+
+
+async def play(client, games, size, win_length, agent, rng, latencies):
+    # Plays random legal moves against the server's AI, alternating sides.
+    results = []
+    for game_index in range(games):
+        human = 1 if game_index % 2 == 0 else -1
+        reply = await client.request("new", size=size, win_length=win_length, agent=agent, human=human)
+        sid = reply["session"]
+        while reply["winner"] is None:
+            row, col = divmod(rng.choice([i for i, v in enumerate(reply["board"]) if v == 0]), size)
+            started = time.perf_counter()
+            reply = await client.request("move", session=sid, row=row, col=col)
+            latencies.append(time.perf_counter() - started)
+            if not reply["ok"]:
+                raise RuntimeError(reply["error"])
+        results.append(reply["winner"] * human)
+        await client.request("close", session=sid)
+    return results
+
+
+async def simulate(args):
+    clients = [await Client.connect(args.host, args.port, args.unix) for _ in range(args.connections)]
+    latencies = []
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(
+        play(clients[i % len(clients)], args.games, args.size, args.win_length, args.agent,
+             random.Random(f"{args.seed}-{i}"), latencies)
+        for i in range(args.sessions)))
+    elapsed = time.perf_counter() - started
+    stats = await clients[0].request("stats")
+    for client in clients:
+        await client.close()
+
+    results = [r for outcome in outcomes for r in outcome]
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{len(results)} games, {len(latencies)} moves in {elapsed:.2f}s over {args.sessions} sessions "
+          f"on {args.connections} connections: {len(latencies) / elapsed:,.0f} moves/sec")
+    print(f"simulated player: won {results.count(1)}, lost {results.count(-1)}, drew {results.count(0)}")
+    print(f"move latency ms: median {statistics.median(latencies) * 1e3:.2f}  p90 {cuts[89] * 1e3:.2f}  "
+          f"p99 {cuts[98] * 1e3:.2f}  max {max(latencies) * 1e3:.2f}")
+    print(f"server: {json.dumps({key: stats[key] for key in ('requests', 'ai_moves', 'cache')})}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test server.py with many concurrent random-move sessions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket path instead of TCP")
+    parser.add_argument("--connections", type=int, default=10)
+    parser.add_argument("--sessions", type=int, default=1000, help="games played at the same time")
+    parser.add_argument("--games", type=int, default=5, help="games per session")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--win-length", type=int, default=None)
+    parser.add_argument("--agent", choices=["minimax", "mcts"], default="minimax")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(simulate(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
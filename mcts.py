@@ -0,0 +1,167 @@
+import argparse
+import math
+import random
+import time
+
+from bitboard import BitboardTicTacToe
+
+
+class Node:
+    __slots__ = ("state", "move", "player", "parent", "children", "untried", "visits", "wins")
+
+    # player is the side that made `move` to reach this node; wins counts its
+    # playout results from that side's point of view (a draw is half a win).
+    def __init__(self, state, move, player, parent, untried):
+        self.state = state
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTSAgent:
+    # UCT Monte Carlo tree search. The budget is a number of playouts, a
+    # wall-clock limit in milliseconds, or both (whichever ends first). The tree
+    # is kept between moves: the next search starts from the node reached by
+    # our move and the opponent's reply when they are in the tree. stats holds
+    # playouts/sec, new nodes/sec and tree size of the last search.
+    def __init__(self, playouts=None, time_ms=None, exploration=1.4, seed=None):
+        self.playouts = playouts if playouts or time_ms else 1000
+        self.time_ms = time_ms
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.root = None
+        self.tree_size = 0
+        self.stats = {}
+
+    def best_move(self, game, player=-1):
+        if game.check_winner() is not None:
+            return None
+        game = game.copy()
+        root = self.reuse(game.get_state(), player)
+        if root is None:
+            root = Node(game.get_state(), None, -player, None, self.shuffled(game.available_moves()))
+            self.tree_size = 1
+        self.root = root
+
+        started = time.perf_counter()
+        deadline = started + self.time_ms / 1000 if self.time_ms else None
+        playouts, tree_size = 0, self.tree_size
+        while playouts == 0 or ((self.playouts is None or playouts < self.playouts) and
+                                (deadline is None or time.perf_counter() < deadline)):
+            self.playout(root, game)
+            playouts += 1
+        elapsed = time.perf_counter() - started
+
+        move = max(root.children.values(), key=lambda child: child.visits).move
+        self.stats = {"playouts": playouts, "seconds": elapsed,
+                      "playouts_per_sec": playouts / elapsed if elapsed else 0.0,
+                      "nodes_per_sec": (self.tree_size - tree_size) / elapsed if elapsed else 0.0,
+                      "tree_size": self.tree_size, "root_visits": root.visits}
+        return move
+
+    def best_action(self, state, available_moves, player):
+        # Same call as the tkinter Q-learning agents: state is a flat board.
+        game = BitboardTicTacToe(round(len(state) ** 0.5) if not isinstance(state, int) else 3)
+        game.set_state(state)
+        return self.best_move(game, player)
+
+    def reuse(self, state, player):
+        # Finds the node for state at the last root or among its grandchildren
+        # (our move, then the opponent's reply) and makes it the new root.
+        if self.root is None:
+            return None
+        candidates = [self.root]
+        for child in self.root.children.values():
+            candidates.extend(child.children.values())
+        for node in candidates:
+            if node.state == state and node.player == -player:
+                node.parent = None
+                self.tree_size = self.count(node)
+                return node
+        return None
+
+    def count(self, node):
+        total, stack = 0, [node]
+        while stack:
+            node = stack.pop()
+            total += 1
+            stack.extend(node.children.values())
+        return total
+
+    def shuffled(self, moves):
+        moves = list(moves)
+        self.random.shuffle(moves)
+        return moves
+
+    def playout(self, root, game):
+        node = root
+        depth = 0
+        # Selection: follow the best UCT child while the node is fully expanded.
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children.values(), key=lambda child: child.wins / child.visits +
+                       self.exploration * math.sqrt(log_visits / child.visits))
+            game.make_move(*node.move, node.player)
+            depth += 1
+        # Expansion: add one untried move unless the game is over.
+        if node.untried and game.check_winner() is None:
+            move = node.untried.pop()
+            game.make_move(*move, -node.player)
+            depth += 1
+            untried = [] if game.check_winner() is not None else self.shuffled(game.available_moves())
+            child = Node(game.get_state(), move, -node.player, node, untried)
+            node.children[move] = child
+            node = child
+            self.tree_size += 1
+        # Rollout: random moves in a shuffled order until the game ends.
+        player = -node.player
+        if game.check_winner() is None:
+            for move in self.shuffled(game.available_moves()):
+                game.make_move(*move, player)
+                depth += 1
+                if game.check_winner() is not None:
+                    break
+                player = -player
+        result = game.check_winner()
+        for _ in range(depth):
+            game.undo_move()
+        # Backpropagation.
+        while node is not None:
+            node.visits += 1
+            if result == node.player:
+                node.wins += 1
+            elif result == 0:
+                node.wins += 0.5
+            node = node.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCTS self-play with per-move search stats")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--win-length", type=int, default=None)
+    parser.add_argument("--playouts", type=int, default=None)
+    parser.add_argument("--time-ms", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    game = BitboardTicTacToe(args.size, args.win_length)
+    agents = {1: MCTSAgent(args.playouts, args.time_ms, seed=args.seed),
+              -1: MCTSAgent(args.playouts, args.time_ms, seed=args.seed)}
+    player = 1
+    while game.check_winner() is None:
+        agent = agents[player]
+        move = agent.best_move(game, player)
+        game.make_move(*move, player)
+        stats = agent.stats
+        print(f"{'X' if player == 1 else 'O'} {move}: {stats['playouts']} playouts, "
+              f"{stats['playouts_per_sec']:.0f}/sec, tree {stats['tree_size']} nodes")
+        player = -player
+    print({1: "X wins", -1: "O wins", 0: "Draw"}[game.check_winner()])
+
+
+if __name__ == "__main__":
+    main()
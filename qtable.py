@@ -0,0 +1,137 @@
+import numpy as np
+
+from bitboard import FULL, TERNARY, WIN_MASKS, encode, masks
+
+NUM_STATES = 3 ** 9
+# LEGAL_PENALTY[empty_mask] is 0 on empty cells and -inf elsewhere, so adding it
+# to a row of q-values masks out occupied cells before the argmax.
+LEGAL_PENALTY = np.array([[0.0 if m >> i & 1 else -np.inf for i in range(9)] for m in range(512)], dtype=np.float32)
+
+
+def live_positions():
+    # Base-3 indices of every position that can still be played from: piece
+    # counts within one of each other (either side may start), no completed
+    # line and at least one empty cell.
+    digits = np.arange(NUM_STATES)[:, None] // 3 ** np.arange(9) % 3
+    cells = np.where(digits == 2, -1, digits)
+    lines = cells[:, [[i for i in range(9) if m >> i & 1] for m in WIN_MASKS]].sum(axis=2)
+    x_count, o_count = (cells == 1).sum(axis=1), (cells == -1).sum(axis=1)
+    live = (abs(x_count - o_count) <= 1) & (abs(lines).max(axis=1) < 3) & (x_count + o_count < 9)
+    return np.flatnonzero(live)
+
+
+LIVE = live_positions()
+# ROWS[base-3 index] is the dense row of a live position, -1 for any other.
+ROWS = np.full(NUM_STATES, -1, dtype=np.int32)
+ROWS[LIVE] = np.arange(len(LIVE))
+NUM_ROWS = len(LIVE)
+
+
+def state_row(state):
+    # Dense row of a bitboard int or a flat 9-cell board, -1 when it has no moves.
+    if not isinstance(state, int):
+        state = encode(state)
+    x, o = masks(state)
+    return ROWS[TERNARY[x] + 2 * TERNARY[o]]
+
+
+def row_state(row):
+    index = int(LIVE[row])
+    cells = []
+    for _ in range(9):
+        index, digit = divmod(index, 3)
+        cells.append((0, 1, -1)[digit])
+    return encode(cells)
+
+
+class DenseQTable:
+    # Q-values for every live position in one float32 array of shape
+    # (NUM_ROWS, 9), indexed by state_row(state) and row * 3 + col. get/[]/items
+    # mirror the dict keyed by (state, (row, col)) so it can replace
+    # QLearningAgent.q_table. Finished positions have no row and read as 0.
+    def __init__(self):
+        self.values = np.zeros((NUM_ROWS, 9), dtype=np.float32)
+        self.visited = np.zeros((NUM_ROWS, 9), dtype=bool)
+        self._scratch = np.empty(9, dtype=np.float32)
+
+    def get(self, key, default=0.0):
+        state, (row, col) = key
+        index = state_row(state)
+        if index < 0 or not self.visited[index, row * 3 + col]:
+            return default
+        return float(self.values[index, row * 3 + col])
+
+    def __getitem__(self, key):
+        state, (row, col) = key
+        index = state_row(state)
+        if index < 0 or not self.visited[index, row * 3 + col]:
+            raise KeyError(key)
+        return float(self.values[index, row * 3 + col])
+
+    def __setitem__(self, key, value):
+        state, (row, col) = key
+        index = state_row(state)
+        if index < 0:
+            raise KeyError(key)
+        self.values[index, row * 3 + col] = value
+        self.visited[index, row * 3 + col] = True
+
+    def __contains__(self, key):
+        state, (row, col) = key
+        index = state_row(state)
+        return index >= 0 and bool(self.visited[index, row * 3 + col])
+
+    def __len__(self):
+        return int(self.visited.sum())
+
+    def keys(self):
+        for index, action in zip(*np.nonzero(self.visited)):
+            yield row_state(index), divmod(int(action), 3)
+
+    def items(self):
+        for index, action in zip(*np.nonzero(self.visited)):
+            yield (row_state(index), divmod(int(action), 3)), float(self.values[index, action])
+
+    def copy(self):
+        table = DenseQTable()
+        table.values[:] = self.values
+        table.visited[:] = self.visited
+        return table
+
+    def masked(self, state):
+        # Row of state with -inf on occupied cells, or None once the game is over.
+        if not isinstance(state, int):
+            state = encode(state)
+        x, o = masks(state)
+        index = ROWS[TERNARY[x] + 2 * TERNARY[o]]
+        if index < 0:
+            return None
+        return np.add(self.values[index], LEGAL_PENALTY[FULL & ~(x | o)], out=self._scratch)
+
+    def best_action(self, state):
+        # Masked argmax over the empty cells of state; None once the game is over.
+        values = self.masked(state)
+        return None if values is None else divmod(int(values.argmax()), 3)
+
+    def max_value(self, state):
+        # Largest q-value over the empty cells of state, 0 once the game is over.
+        values = self.masked(state)
+        return 0.0 if values is None else float(values.max())
+
+    def __getstate__(self):
+        # np.asarray so a memory-mapped table pickles as plain arrays.
+        return {"values": np.asarray(self.values), "visited": np.asarray(self.visited)}
+
+    def __setstate__(self, saved):
+        self.values = saved["values"]
+        self.visited = saved["visited"]
+        self._scratch = np.empty(9, dtype=np.float32)
+
+
+def as_dense(q_table):
+    if isinstance(q_table, DenseQTable):
+        return q_table
+    table = DenseQTable()
+    for key, value in q_table.items():
+        table[key] = value
+    return table
@@ -0,0 +1,217 @@
+import argparse
+import os
+import struct
+
+import numpy as np
+
+from book import BOOK
+
+RECORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "games.rec")
+RECORDS_MAGIC = b"TTTR"
+RECORDS_VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, version, record size
+# Every record is RECORD_SIZE bytes. A game is the X and O agent ids, a flags
+# byte (bit 0: O moved first, bits 1-2: result 0 draw / 1 X won / 2 O won /
+# 3 unfinished), the number of moves and the cells played as nine 4-bit codes
+# in move order (15 pads). A record whose first byte is NAME_RECORD names an
+# agent id instead: [NAME_RECORD, id, 7 bytes of the UTF-8 name], with longer
+# names continued in the following name records.
+RECORD_SIZE = 9
+NAME_RECORD = 255
+NAME_CHUNK = RECORD_SIZE - 2
+RESULT_CODES = {0: 0, 1: 1, -1: 2, None: 3}
+POW3 = 3 ** np.arange(9)
+
+
+class GameRecorder:
+    # Append-only writer for classic 3 x 3 games. Records are buffered and
+    # written in bulk every flush_every games and on close().
+    def __init__(self, path=RECORDS_PATH, flush_every=1024):
+        self.path = path
+        self.flush_every = flush_every
+        self.buffer = bytearray()
+        self.pending = 0
+        self.ids = {}
+        if os.path.exists(path):
+            for agent_id, name in read_names(path).items():
+                self.ids[name] = agent_id
+            # Drop a partial record left by an interrupted flush, so new
+            # records stay aligned.
+            size = os.path.getsize(path)
+            whole = HEADER.size + (size - HEADER.size) // RECORD_SIZE * RECORD_SIZE
+            if whole < size:
+                with open(path, "r+b") as f:
+                    f.truncate(whole)
+        else:
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(RECORDS_MAGIC, RECORDS_VERSION, RECORD_SIZE))
+
+    def agent_id(self, name):
+        if name not in self.ids:
+            if len(self.ids) == NAME_RECORD:
+                raise ValueError(f"a record file holds at most {NAME_RECORD} agents")
+            agent_id = self.ids[name] = len(self.ids)
+            encoded = name.encode()
+            for i in range(0, max(len(encoded), 1), NAME_CHUNK):
+                self.buffer += bytes([NAME_RECORD, agent_id]) + encoded[i:i + NAME_CHUNK].ljust(NAME_CHUNK, b"\0")
+        return self.ids[name]
+
+    def record(self, x_agent, o_agent, moves, result, first=1):
+        # moves are the (row, col) of every move in the order played, starting
+        # with the side `first`; result is 1, -1, 0 or None if unfinished.
+        codes = [row * 3 + col for row, col in moves] + [15] * (9 - len(moves))
+        flags = (first == -1) | RESULT_CODES[result] << 1
+        self.buffer += bytes([self.agent_id(x_agent), self.agent_id(o_agent), flags, len(moves)])
+        self.buffer += bytes(codes[i] | (codes[i + 1] if i < 8 else 15) << 4 for i in range(0, 9, 2))
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            with open(self.path, "ab") as f:
+                f.write(self.buffer)
+            self.buffer.clear()
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_chunks(path=RECORDS_PATH, chunk=1 << 20):
+    # Streams the file as (names, games) pieces of at most chunk records each:
+    # names maps agent id to name as defined so far, games is an (n, 9) uint8
+    # array of game records.
+    names = {}
+    with open(path, "rb") as f:
+        magic, version, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != RECORDS_MAGIC or version != RECORDS_VERSION or size != RECORD_SIZE:
+            raise ValueError(f"{path} is not a version {RECORDS_VERSION} game record file")
+        while data := f.read(chunk * RECORD_SIZE):
+            rows = np.frombuffer(data[:len(data) - len(data) % RECORD_SIZE], dtype=np.uint8).reshape(-1, RECORD_SIZE)
+            is_name = rows[:, 0] == NAME_RECORD
+            for row in rows[is_name]:
+                names[int(row[1])] = names.get(int(row[1]), b"") + bytes(row[2:]).rstrip(b"\0")
+            yield {i: name.decode() for i, name in names.items()}, rows[~is_name]
+
+
+def read_names(path=RECORDS_PATH):
+    names = {}
+    for names, _ in read_chunks(path):
+        pass
+    return names
+
+
+def decode_cells(games):
+    # (n, 9) cells in move order, 15 past the last move.
+    packed = games[:, 4:9]
+    return np.stack([packed & 15, packed >> 4], axis=2).reshape(-1, 10)[:, :9]
+
+
+def valid_games(games):
+    # Rows of games that can be replayed: at most nine moves, every one on a
+    # cell of the board and no cell played twice.
+    cells = decode_cells(games).astype(np.int64)
+    lengths = games[:, 3].astype(np.int64)
+    played = np.arange(9) < lengths[:, None]
+    bits = np.where(played & (cells < 9), 1 << np.minimum(cells, 8), 0)
+    return ((lengths <= 9) & ~(played & (cells >= 9)).any(axis=1)
+            & (bits.sum(axis=1) == np.bitwise_or.reduce(bits, axis=1)))
+
+
+def board_text(index):
+    # Base-3 position index as three rows of X, O and '.'.
+    cells = "".join(".XO"[index // 3 ** i % 3] for i in range(9))
+    return " ".join(cells[i:i + 3] for i in range(0, 9, 3))
+
+
+def analyze(path=RECORDS_PATH, chunk=1 << 20):
+    # One pass over the file. Every move is checked against the book: a blunder
+    # is a move after which the mover's game-theoretic result (win, draw or
+    # loss) is worse than before it.
+    entries = np.frombuffer(BOOK.entries, dtype=np.uint8)
+    values = np.sign((entries & 15).astype(np.int8) - 8)
+    best = entries >> 4
+    outcomes = np.zeros((NAME_RECORD, 3), dtype=np.int64)  # wins, draws, losses per agent
+    moves = np.zeros(NAME_RECORD, dtype=np.int64)
+    blunders = np.zeros(NAME_RECORD, dtype=np.int64)
+    openings = np.zeros(16 * 16, dtype=np.int64)
+    blunder_moves = np.zeros(len(entries) * 9, dtype=np.int64)
+    names = {}
+    games = unfinished = damaged = 0
+    for names, rows in read_chunks(path, chunk):
+        valid = valid_games(rows)
+        damaged += int((~valid).sum())
+        rows = rows[valid]
+        n = len(rows)
+        games += n
+        x_ids, o_ids, flags, lengths = (rows[:, i].astype(np.int64) for i in range(4))
+        result = flags >> 1 & 3
+        done = result != 3
+        unfinished += int((~done).sum())
+        x_score = np.select([result == 1, result == 2], [0, 2], 1)  # column in outcomes for X
+        np.add.at(outcomes, (x_ids[done], x_score[done]), 1)
+        np.add.at(outcomes, (o_ids[done], 2 - x_score[done]), 1)
+
+        cells = decode_cells(rows).astype(np.int64)
+        openings += np.bincount(cells[:, 0] * 16 + cells[:, 1], minlength=256)
+        position = np.zeros(n, dtype=np.int64)
+        mover = np.where(flags & 1, -1, 1)
+        for k in range(9):
+            active = lengths > k
+            cell = np.minimum(cells[:, k], 8)
+            before = 2 * position + (mover == -1)
+            moved = position + np.where(active, np.where(mover == 1, 1, 2) * POW3[cell], 0)
+            after = 2 * moved + (mover == 1)
+            bad = active & (-values[after] < values[before])
+            agent = np.where(mover == 1, x_ids, o_ids)
+            moves += np.bincount(agent[active], minlength=NAME_RECORD)
+            blunders += np.bincount(agent[bad], minlength=NAME_RECORD)
+            blunder_moves += np.bincount(before[bad] * 9 + cell[bad], minlength=len(blunder_moves))
+            position = moved
+            mover = -mover
+
+    print(f"{games} games ({unfinished} unfinished, {damaged} damaged records skipped)")
+    print(f"{'agent':<16} {'games':>9} {'win':>7} {'draw':>7} {'loss':>7} {'moves':>10} {'blunders':>9}")
+    for agent_id, name in sorted(names.items()):
+        total = outcomes[agent_id].sum()
+        if not total and not moves[agent_id]:
+            continue
+        win, draw, loss = outcomes[agent_id] / max(total, 1)
+        print(f"{name:<16} {total:>9} {win:>7.1%} {draw:>7.1%} {loss:>7.1%} {moves[agent_id]:>10} "
+              f"{blunders[agent_id] / max(moves[agent_id], 1):>9.2%}")
+
+    print("\nmost played openings (first two moves as row,col):")
+    for code in np.argsort(openings)[::-1][:10]:
+        if not openings[code]:
+            break
+        first, second = divmod(int(code), 16)
+        played = [divmod(c, 3) for c in (first, second) if c < 9]
+        print(f"  {' '.join(f'{r},{c}' for r, c in played):<10} {openings[code] / max(games, 1):>7.2%}")
+
+    print("\nmost frequent blunders:")
+    for code in np.argsort(blunder_moves)[::-1][:10]:
+        if not blunder_moves[code]:
+            break
+        before, cell = divmod(int(code), 9)
+        side = "O" if before & 1 else "X"
+        print(f"  {board_text(before // 2)}  {side} played {divmod(cell, 3)} instead of "
+              f"{divmod(int(best[before]), 3)}: {blunder_moves[code]} times")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Win rates, openings and blunders from a game record file")
+    parser.add_argument("path", nargs="?", default=RECORDS_PATH)
+    parser.add_argument("--chunk", type=int, default=1 << 20, help="records read per step")
+    args = parser.parse_args()
+    analyze(args.path, args.chunk)
+
+
+if __name__ == "__main__":
+    main()
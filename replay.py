@@ -0,0 +1,78 @@
+import numpy as np
+
+from bitboard import FULL, encode, masks
+from qtable import LEGAL_PENALTY, state_row
+
+
+class ReplayBuffer:
+    # Fixed-capacity ring buffer of transitions in NumPy arrays: the DenseQTable
+    # row of the state, the action cell, the reward, the row of the next state
+    # (-1 once the game is over) and the empty-cell mask of the next state. Once
+    # full, new transitions overwrite the oldest. With prioritized=True batches
+    # are drawn in proportion to |TD error| ** priority_alpha, new transitions
+    # start at the highest priority seen, and updates are scaled by importance
+    # weights with exponent beta.
+    def __init__(self, capacity=100000, prioritized=False, priority_alpha=0.6, beta=0.4, seed=None):
+        self.capacity = capacity
+        self.rows = np.zeros(capacity, dtype=np.int32)
+        self.actions = np.zeros(capacity, dtype=np.uint8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_rows = np.zeros(capacity, dtype=np.int32)
+        self.next_empty = np.zeros(capacity, dtype=np.uint16)
+        self.prioritized = prioritized
+        self.priorities = np.zeros(capacity, dtype=np.float64) if prioritized else None
+        self.priority_alpha = priority_alpha
+        self.beta = beta
+        self.max_priority = 1.0
+        self.random = np.random.default_rng(seed)
+        self.size = 0
+        self.position = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state):
+        # Same arguments as QLearningAgent.update_q_value.
+        if not isinstance(next_state, int):
+            next_state = encode(next_state)
+        x, o = masks(next_state)
+        i = self.position
+        self.rows[i] = state_row(state)
+        self.actions[i] = action[0] * 3 + action[1]
+        self.rewards[i] = reward
+        self.next_rows[i] = state_row(next_state)
+        self.next_empty[i] = FULL & ~(x | o)
+        if self.prioritized:
+            self.priorities[i] = self.max_priority
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        # Indices of a batch and the weight of each one's update.
+        if not self.prioritized:
+            return self.random.integers(0, self.size, batch_size), 1.0
+        cumulative = np.cumsum(self.priorities[:self.size])
+        index = np.searchsorted(cumulative, self.random.random(batch_size) * cumulative[-1], side="right")
+        index = np.minimum(index, self.size - 1)
+        weights = (self.size * self.priorities[index] / cumulative[-1]) ** -self.beta
+        return index, weights / weights.max()
+
+    def learn(self, table, batch_size, alpha, gamma):
+        # One Q-learning step on a sampled batch, applied to the DenseQTable in
+        # place: the target is reward + gamma * max over the legal moves of the
+        # next state. A (row, action) drawn k times moves by the mean of its k steps.
+        if not self.size:
+            return
+        index, weights = self.sample(batch_size)
+        rows, actions, next_rows = self.rows[index], self.actions[index], self.next_rows[index]
+        future = (table.values[np.maximum(next_rows, 0)] + LEGAL_PENALTY[self.next_empty[index]]).max(axis=1)
+        targets = self.rewards[index] + gamma * np.where(next_rows >= 0, future, 0.0)
+        errors = targets - table.values[rows, actions]
+        cells = rows * 9 + actions
+        repeats = np.bincount(cells, minlength=table.values.size)[cells]
+        np.add.at(table.values.reshape(-1), cells, alpha * weights * errors / repeats)
+        table.visited[rows, actions] = True
+        if self.prioritized:
+            # Stored already raised to priority_alpha.
+            self.priorities[index] = (np.abs(errors) + 1e-3) ** self.priority_alpha
+            self.max_priority = max(self.max_priority, float(self.priorities[index].max()))
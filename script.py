@@ -1,12 +1,17 @@
-import numpy as np
-import random
-import pickle
+import argparse
 import pygame
+from concurrent.futures import ThreadPoolExecutor
+from bitboard import BitboardTicTacToe
+from core import MinimaxAgent, QLearningAgent
+from mcts import MCTSAgent
 
 
-def init_pygame():
+def cell_size(size):
+    return min(100, 600 // size)
+
+def init_pygame(size=3):
     pygame.init()
-    screen = pygame.display.set_mode((300, 300))
+    screen = pygame.display.set_mode((size * cell_size(size),) * 2)
     pygame.display.set_caption("Tic Tac Toe RL")
     return screen
 
@@ -14,136 +19,116 @@ WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 BLUE = (0, 0, 255)
-
-def draw_board(screen, board):
-    screen.fill(WHITE)
-    for i in range(1, 3):
-        pygame.draw.line(screen, BLACK, (0, i * 100), (300, i * 100), 3)
-        pygame.draw.line(screen, BLACK, (i * 100, 0), (i * 100, 300), 3)
-    for r in range(3):
-        for c in range(3):
-            if board[r, c] == 1:
-                pygame.draw.circle(screen, BLUE, (c * 100 + 50, r * 100 + 50), 40, 3)
-            elif board[r, c] == -1:
-                pygame.draw.line(screen, RED, (c * 100 + 20, r * 100 + 20), (c * 100 + 80, r * 100 + 80), 3)
-                pygame.draw.line(screen, RED, (c * 100 + 80, r * 100 + 20), (c * 100 + 20, r * 100 + 80), 3)
-    pygame.display.flip()
-
-class TicTacToe:
-    def __init__(self):
-        self.board = np.zeros((3, 3), dtype=int)  
-
-    def reset(self):
-        self.board.fill(0)
-        return self.get_state()
-
-    def get_state(self):
-        return tuple(self.board.flatten())
-
-    def available_moves(self):
-        return [(r, c) for r in range(3) for c in range(3) if self.board[r, c] == 0]
-
-    def make_move(self, row, col, player):
-        self.board[row, col] = player
-
-    def check_winner(self):
-        for i in range(3):
-            if abs(sum(self.board[i, :])) == 3:
-                return np.sign(sum(self.board[i, :]))
-            if abs(sum(self.board[:, i])) == 3:
-                return np.sign(sum(self.board[:, i]))
-        if abs(sum([self.board[i, i] for i in range(3)])) == 3:
-            return np.sign(sum([self.board[i, i] for i in range(3)]))
-        if abs(sum([self.board[i, 2 - i] for i in range(3)])) == 3:
-            return np.sign(sum([self.board[i, 2 - i]]))
-        if len(self.available_moves()) == 0:
-            return 0  # Draw
-        return None
-
-class QLearningAgent:
-    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1):
-        self.q_table = {}
-        self.alpha = alpha
-        self.gamma = gamma
-        self.epsilon = epsilon
-
-    def get_q_value(self, state, action):
-        return self.q_table.get((state, action), 0.0)
-
-    def best_action(self, state, available_moves):
-        if random.random() < self.epsilon:
-            return random.choice(available_moves)
-        q_values = {move: self.get_q_value(state, move) for move in available_moves}
-        return max(q_values, key=q_values.get)
-
-    def update_q_value(self, state, action, reward, next_state):
-        max_future_q = max([self.get_q_value(next_state, move) for move in TicTacToe().available_moves()], default=0)
-        self.q_table[(state, action)] = (1 - self.alpha) * self.get_q_value(state, action) + self.alpha * (reward + self.gamma * max_future_q)
-
-class MinimaxAgent:
-    def minimax(self, game, depth, is_max):
-        winner = game.check_winner()
-        if winner == 1:
-            return 10 - depth
-        elif winner == -1:
-            return depth - 10
-        elif winner == 0:
-            return 0
-        
-        if is_max:
-            best_score = -float('inf')
-            for move in game.available_moves():
-                game.make_move(*move, 1)
-                score = self.minimax(game, depth + 1, False)
-                game.make_move(*move, 0)
-                best_score = max(best_score, score)
-            return best_score
-        else:
-            best_score = float('inf')
-            for move in game.available_moves():
-                game.make_move(*move, -1)
-                score = self.minimax(game, depth + 1, True)
-                game.make_move(*move, 0)
-                best_score = min(best_score, score)
-            return best_score
-
-    def best_move(self, game):
-        best_score = -float('inf')
-        best_move = None
-        for move in game.available_moves():
-            game.make_move(*move, 1)
-            score = self.minimax(game, 0, False)
-            game.make_move(*move, 0)
-            if score > best_score:
-                best_score = score
-                best_move = move
-        return best_move
-
-def play_game():
-    screen = init_pygame()
-    game = TicTacToe()
+AI_MOVE = pygame.USEREVENT + 1
+
+class BoardRenderer:
+    # The grid is drawn once into a cached background and the two pieces once
+    # into cell sized sprites (player 1 a blue circle, player -1 a red cross),
+    # so a move costs one blit and a display update of that cell whatever the
+    # board size.
+    def __init__(self, screen, size):
+        self.screen = screen
+        self.cell = cell = cell_size(size)
+        side = size * cell
+        self.background = pygame.Surface((side, side))
+        self.background.fill(WHITE)
+        for i in range(1, size):
+            pygame.draw.line(self.background, BLACK, (0, i * cell), (side, i * cell), 3)
+            pygame.draw.line(self.background, BLACK, (i * cell, 0), (i * cell, side), 3)
+        circle_sprite = pygame.Surface((cell, cell), pygame.SRCALPHA)
+        pygame.draw.circle(circle_sprite, BLUE, (cell // 2, cell // 2), cell * 2 // 5, 3)
+        cross_sprite = pygame.Surface((cell, cell), pygame.SRCALPHA)
+        pygame.draw.line(cross_sprite, RED, (cell // 5, cell // 5), (cell * 4 // 5, cell * 4 // 5), 3)
+        pygame.draw.line(cross_sprite, RED, (cell * 4 // 5, cell // 5), (cell // 5, cell * 4 // 5), 3)
+        self.sprites = {1: circle_sprite, -1: cross_sprite}
+
+    def draw_board(self, board):
+        self.screen.blit(self.background, (0, 0))
+        for r in range(len(board)):
+            for c in range(len(board)):
+                if board[r, c]:
+                    self.screen.blit(self.sprites[int(board[r, c])], (c * self.cell, r * self.cell))
+        pygame.display.flip()
+
+    def draw_move(self, row, col, player):
+        rect = pygame.Rect(col * self.cell, row * self.cell, self.cell, self.cell)
+        self.screen.blit(self.background, rect, rect)
+        self.screen.blit(self.sprites[player], rect)
+        pygame.display.update(rect)
+
+def post_ai_move(future):
+    # Runs on the worker thread; the move is handled by the event loop.
+    if not future.cancelled():
+        pygame.event.post(pygame.event.Event(AI_MOVE, future=future))
+
+def play_game(size=3, win_length=None, time_limit=1.0, agent_type="minimax", recorder=None):
+    screen = init_pygame(size)
+    renderer = BoardRenderer(screen, size)
+    game = BitboardTicTacToe(size, win_length)
+    renderer.draw_board(game.board)
     agent = QLearningAgent()
-    opponent = MinimaxAgent()
+    if agent_type == "mcts":
+        opponent = MCTSAgent(time_ms=time_limit * 1000)
+    else:
+        opponent = MinimaxAgent(time_limit=time_limit)
+    executor = ThreadPoolExecutor(max_workers=1)
+    pending = None
     running = True
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+        # Sleeps until the next input or AI_MOVE event, so an idle window uses no CPU.
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            running = False
+        elif event.type == pygame.WINDOWEXPOSED:
+            renderer.draw_board(game.board)
+        elif event.type == pygame.MOUSEBUTTONDOWN and pending is None:
+            x, y = event.pos
+            row, col = y // cell_size(size), x // cell_size(size)
+            if (row, col) in game.available_moves():
+                game.make_move(row, col, 1)
+                renderer.draw_move(row, col, 1)
+                winner = game.check_winner()
+                if winner:
+                    running = False
+                elif winner is None:
+                    pending = executor.submit(opponent.best_move, game.copy())
+                    pending.add_done_callback(post_ai_move)
+                    pygame.display.set_caption("Tic Tac Toe RL - thinking...")
+        elif event.type == AI_MOVE and event.future is pending:
+            pending = None
+            pygame.display.set_caption("Tic Tac Toe RL")
+            move = event.future.result()
+            if move:
+                game.make_move(*move, -1)
+                renderer.draw_move(*move, -1)
+            if game.check_winner():
                 running = False
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                x, y = event.pos
-                row, col = y // 100, x // 100
-                if (row, col) in game.available_moves():
-                    game.make_move(row, col, 1)
-                    draw_board(screen, game.board)
-                    if game.check_winner():
-                        running = False
-                    move = opponent.best_move(game)
-                    if move:
-                        game.make_move(*move, -1)
-                    draw_board(screen, game.board)
-                    if game.check_winner():
-                        running = False
+    if pending is not None:
+        pending.cancel()
+    executor.shutdown(wait=False)
     pygame.quit()
+    if recorder is not None and game.check_winner() is not None and size == 3 and game.win_length == 3:
+        recorder.record("human", agent_type, [divmod(cell, 3) for cell, _, _ in game.history], game.check_winner())
 
 if __name__ == "__main__":
-    play_game()
+    parser = argparse.ArgumentParser(description="Play against the AI")
+    parser.add_argument("--size", type=int, default=3, help="board is SIZE x SIZE")
+    parser.add_argument("--win-length", type=int, default=None, help="stones in a row to win (default: min(size, 5))")
+    parser.add_argument("--time-limit", type=float, default=1.0, help="AI seconds per move on boards above 3 x 3")
+    parser.add_argument("--agent", choices=["minimax", "mcts"], default="minimax",
+                        help="mcts searches for --time-limit seconds on every board size")
+    parser.add_argument("--trace", help="write a Chrome trace and the stats of the AI moves here (see instrument.py)")
+    parser.add_argument("--record", help="append 3 x 3 games to this game record file (see records.py)")
+    args = parser.parse_args()
+    if args.trace:
+        import instrument
+        instrument.enable(MinimaxAgent)
+    recorder = None
+    if args.record:
+        from records import GameRecorder
+        recorder = GameRecorder(args.record)
+    play_game(args.size, args.win_length, args.time_limit, args.agent, recorder)
+    if recorder is not None:
+        recorder.close()
+    if args.trace:
+        instrument.STATS.dump_trace(args.trace)
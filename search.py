@@ -0,0 +1,143 @@
+import time
+
+WIN = 1 << 40
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class Timeout(Exception):
+    pass
+
+
+class SearchAgent:
+    # Iterative-deepening alpha-beta for any BitboardTicTacToe size. Each
+    # iteration searches one ply deeper until the time budget runs out, and the
+    # move of the last finished iteration is played. Moves are ordered by the
+    # transposition-table move first, then by how many friendly or enemy stones
+    # already sit on the open lines through the cell. Leaves are scored by the
+    # open lines each side has, weighted by how full they are.
+    def __init__(self, time_limit=1.0, max_depth=None):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = {}
+        self.nodes = 0
+        self.depth = 0
+
+    def best_move(self, game, player=-1):
+        geometry = game.geometry
+        me, opp = (game.x, game.o) if player == 1 else (game.o, game.x)
+        empty = geometry.full & ~(me | opp)
+        if not empty or game.check_winner() is not None:
+            return None
+        self.deadline = time.perf_counter() + self.time_limit
+        self.nodes = 0
+        self.table.clear()
+        moves = self.candidates(geometry, me, opp)
+        best = moves[0]
+        max_depth = self.max_depth or bin(empty).count("1")
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self.root(geometry, me, opp, depth)
+            except Timeout:
+                break
+            best, self.depth = move, depth
+            if abs(score) >= WIN - geometry.cells:
+                break  # forced win or loss found; deeper search cannot change it
+        return divmod(best, geometry.size)
+
+    def root(self, geometry, me, opp, depth):
+        alpha, best_score, best = -WIN - 1, -WIN - 1, None
+        entry = self.table.get((me, opp))
+        for cell in self.order(geometry, me, opp, entry[3] if entry else None):
+            bit = 1 << cell
+            if geometry.is_win(me | bit, cell):
+                return WIN, cell
+            score = -self.negamax(geometry, opp, me | bit, depth - 1, -WIN - 1, -alpha, 1)
+            if score > best_score:
+                best_score, best = score, cell
+            alpha = max(alpha, score)
+        self.table[(me, opp)] = (depth, EXACT, best_score, best)
+        return best_score, best
+
+    def negamax(self, geometry, me, opp, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes & 15 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+        if me | opp == geometry.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(geometry, me, opp)
+
+        entry = self.table.get((me, opp))
+        if entry is not None and entry[0] >= depth:
+            _, flag, score, _ = entry
+            if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
+                return score
+
+        original_alpha = alpha
+        best_score, best = -WIN - 1, None
+        for cell in self.order(geometry, me, opp, entry[3] if entry else None):
+            bit = 1 << cell
+            if geometry.is_win(me | bit, cell):
+                score = WIN - ply
+            else:
+                score = -self.negamax(geometry, opp, me | bit, depth - 1, -beta, -alpha, ply + 1)
+            if score > best_score:
+                best_score, best = score, cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[(me, opp)] = (depth, flag, best_score, best)
+        return best_score
+
+    def candidates(self, geometry, me, opp):
+        stones = me | opp
+        empty = geometry.full & ~stones
+        if geometry.size > 4 and stones:
+            near = 0
+            for cell in range(geometry.cells):
+                if stones >> cell & 1:
+                    near |= geometry.neighbours[cell]
+            empty &= near
+        elif not stones:
+            # Empty board: every opening is symmetric to one near the centre.
+            centre = geometry.size // 2
+            return [centre * geometry.size + centre]
+        return [cell for cell in range(geometry.cells) if empty >> cell & 1]
+
+    def order(self, geometry, me, opp, first=None):
+        scored = []
+        for cell in self.candidates(geometry, me, opp):
+            if cell == first:
+                continue
+            score = 0
+            for m in geometry.lines_through[cell]:
+                if not m & opp:
+                    score += 4 ** bin(m & me).count("1")
+                elif not m & me:
+                    score += 4 ** bin(m & opp).count("1")
+            scored.append((score, cell))
+        scored.sort(reverse=True)
+        moves = [cell for _, cell in scored]
+        if first is not None:
+            moves.insert(0, first)
+        return moves
+
+    def evaluate(self, geometry, me, opp):
+        # Open lines for the side to move minus open lines for the opponent,
+        # each worth 10 ** (stones on it).
+        score = 0
+        for m in geometry.lines:
+            if not m & opp:
+                n = bin(m & me).count("1")
+                if n:
+                    score += 10 ** n
+            elif not m & me:
+                score -= 10 ** bin(m & opp).count("1")
+        return score
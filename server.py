@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from bitboard import BitboardTicTacToe
+from core import MinimaxAgent
+from mcts import MCTSAgent
+
+# One JSON object per line each way. Requests carry an "op" and may carry an
+# "id", which is echoed back so a client can have many requests in flight on
+# one connection:
+#   {"op": "new", "size": 3, "win_length": 3, "agent": "minimax", "human": 1}
+#   {"op": "move", "session": 7, "row": 1, "col": 1}
+#   {"op": "state", "session": 7}    {"op": "close", "session": 7}    {"op": "stats"}
+# Game replies hold the session, the flat board (1 X, -1 O, 0 empty), the AI's
+# reply as [row, col] and the winner (1, -1, 0 for a draw, null while playing);
+# failures are {"ok": false, "error": "..."}. Sessions end with their connection.
+AGENTS = ("minimax", "mcts")
+MAX_SIZE = 19
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class AgentPool:
+    # A fixed set of agents shared by every session, plus a shared cache of the
+    # moves already chosen per (board, position, side to move). A move borrows
+    # an idle agent and runs on the executor so the event loop keeps serving
+    # other sessions. The 3 x 3 minimax moves come straight from the book.
+    def __init__(self, agent_type, size, time_limit, executor, cache_size=100000):
+        if agent_type == "mcts":
+            self.agents = [MCTSAgent(time_ms=time_limit * 1000) for _ in range(size)]
+        else:
+            self.agents = [MinimaxAgent(time_limit=time_limit) for _ in range(size)]
+        self.idle = asyncio.Queue()
+        for agent in self.agents:
+            self.idle.put_nowait(agent)
+        self.agent_type = agent_type
+        self.executor = executor
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = self.misses = 0
+
+    async def best_move(self, game, player):
+        if self.agent_type == "minimax" and game.size == 3 and game.win_length == 3:
+            return self.agents[0].best_move(game, player)
+        key = (game.size, game.win_length, game.get_state(), player)
+        move = self.cache.get(key)
+        if move is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return move
+        self.misses += 1
+        agent = await self.idle.get()
+        try:
+            move = await asyncio.get_running_loop().run_in_executor(self.executor, agent.best_move, game.copy(), player)
+        finally:
+            self.idle.put_nowait(agent)
+        self.cache[key] = move
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return move
+
+
+def integer(request, name, default=None):
+    # The field as an int, or default when it is absent; bools and floats are refused.
+    value = request.get(name, default)
+    if value is default:
+        return value
+    if type(value) is not int:
+        raise ProtocolError(f"{name} must be an integer, got {value!r}")
+    return value
+
+
+class Session:
+    def __init__(self, game, human, agent_type):
+        self.game = game
+        self.human = human
+        self.agent_type = agent_type
+        self.lock = asyncio.Lock()
+
+
+class GameServer:
+    def __init__(self, pool_size=4, time_limit=0.2):
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+        self.pool_size = pool_size
+        self.time_limit = time_limit
+        self.pools = {}
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.connections = 0
+        self.requests = 0
+        self.ai_moves = 0
+
+    def pool(self, agent_type):
+        if agent_type not in self.pools:
+            self.pools[agent_type] = AgentPool(agent_type, self.pool_size, self.time_limit, self.executor)
+        return self.pools[agent_type]
+
+    def reply(self, sid, session, ai_move=None):
+        game = session.game
+        cells = game.geometry.cells
+        board = [1 if game.x >> i & 1 else -1 if game.o >> i & 1 else 0 for i in range(cells)]
+        return {"ok": True, "session": sid, "board": board, "ai_move": ai_move, "winner": game.check_winner()}
+
+    def session(self, request, owned):
+        sid = integer(request, "session")
+        if sid not in owned:
+            raise ProtocolError(f"unknown session {sid!r}")
+        return sid, self.sessions[sid]
+
+    async def ai_reply(self, session):
+        game = session.game
+        if game.check_winner() is not None:
+            return None
+        move = await self.pool(session.agent_type).best_move(game, -session.human)
+        game.make_move(*move, -session.human)
+        self.ai_moves += 1
+        return list(move)
+
+    async def handle(self, request, owned):
+        op = request.get("op")
+        if op == "new":
+            agent_type = request.get("agent", "minimax")
+            if agent_type not in AGENTS:
+                raise ProtocolError(f"agent must be one of {', '.join(AGENTS)}")
+            human = integer(request, "human", 1)
+            if human not in (1, -1):
+                raise ProtocolError("human must be 1 (X, moves first) or -1 (O)")
+            size = integer(request, "size", 3)
+            if not 1 <= size <= MAX_SIZE:
+                raise ProtocolError(f"size must be between 1 and {MAX_SIZE}")
+            try:
+                game = BitboardTicTacToe(size, integer(request, "win_length"))
+            except ValueError as e:
+                raise ProtocolError(str(e))
+            sid = next(self.ids)
+            session = self.sessions[sid] = Session(game, human, agent_type)
+            owned.add(sid)
+            async with session.lock:
+                ai_move = await self.ai_reply(session) if human == -1 else None
+            return self.reply(sid, session, ai_move)
+        if op == "move":
+            sid, session = self.session(request, owned)
+            async with session.lock:
+                game = session.game
+                row, col = integer(request, "row"), integer(request, "col")
+                if game.check_winner() is not None:
+                    raise ProtocolError("game is over")
+                if (row, col) not in game.available_moves():
+                    raise ProtocolError(f"illegal move {[row, col]}")
+                game.make_move(row, col, session.human)
+                try:
+                    ai_move = await self.ai_reply(session)
+                except Exception:
+                    # Take the move back so the client can retry it.
+                    game.undo_move()
+                    raise
+                return self.reply(sid, session, ai_move)
+        if op == "state":
+            return self.reply(*self.session(request, owned))
+        if op == "close":
+            sid, _ = self.session(request, owned)
+            owned.discard(sid)
+            del self.sessions[sid]
+            return {"ok": True, "session": sid}
+        if op == "stats":
+            return {"ok": True, "sessions": len(self.sessions), "connections": self.connections,
+                    "requests": self.requests, "ai_moves": self.ai_moves,
+                    "cache": {name: {"hits": pool.hits, "misses": pool.misses, "size": len(pool.cache)}
+                              for name, pool in self.pools.items()}}
+        raise ProtocolError(f"unknown op {op!r}")
+
+    async def answer(self, line, owned, writer):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError("request must be a JSON object")
+        except (ValueError, ProtocolError) as e:
+            response = {"ok": False, "error": str(e)}
+        else:
+            self.requests += 1
+            try:
+                response = await self.handle(request, owned)
+            except ProtocolError as e:
+                response = {"ok": False, "error": str(e)}
+            except Exception as e:
+                # A bug or an agent failure still gets an answer, so the client is not left waiting.
+                response = {"ok": False, "error": f"internal error: {type(e).__name__}: {e}"}
+            if "id" in request:
+                response["id"] = request["id"]
+        writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+        await writer.drain()
+
+    async def connection(self, reader, writer):
+        # Each request runs as its own task so slow AI moves in one session do
+        # not hold up the others on the same connection.
+        owned = set()
+        tasks = set()
+        self.connections += 1
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.answer(line, owned, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            for sid in owned:
+                self.sessions.pop(sid, None)
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, unix=None, pool_size=4, time_limit=0.2):
+    server = GameServer(pool_size, time_limit)
+    if unix:
+        if os.path.exists(unix):
+            os.unlink(unix)
+        listener = await asyncio.start_unix_server(server.connection, unix, limit=1 << 20)
+    else:
+        listener = await asyncio.start_server(server.connection, host, port, limit=1 << 20)
+    print(f"serving on {unix or f'{host}:{port}'}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless tic-tac-toe game server (JSON lines over TCP or a Unix socket)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--pool-size", type=int, default=4, help="agents per agent type shared by all sessions")
+    parser.add_argument("--time-limit", type=float, default=0.2, help="AI seconds per move on boards above 3 x 3")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.pool_size, args.time_limit))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
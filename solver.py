@@ -0,0 +1,102 @@
+from bitboard import FULL, INVERSE, TRANSFORMS, canonicalize, encode, masks, winner
+
+EXACT, LOWER, UPPER = 0, 1, 2
+BITS = [1 << i for i in range(9)]
+
+
+class Solver:
+    # Transposition table keyed by the canonical bitboard state (see
+    # bitboard.canonicalize) with the side to move in bit 18, so the 8
+    # symmetric copies of a position share one entry and its best move is
+    # stored on the canonical board. Scores are negamax values for the player
+    # to move: a win with n pieces on the board is worth 10 - n, so faster wins
+    # and slower losses are preferred. An optional precomputed book (see
+    # book.py) is consulted before searching.
+    def __init__(self, book=None):
+        self.table = {}
+        self.book = book
+
+    def negamax(self, x, o, player, alpha=-float('inf'), beta=float('inf')):
+        canonical, transform = canonicalize(x | o << 9)
+        key = canonical | (player == -1) << 18
+        entry = self.table.get(key)
+        if entry is not None:
+            flag, score, move = entry
+            if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
+                return score
+
+        result = winner(x, o)
+        if result is not None:
+            score = 0 if result == 0 else (10 - bin(x | o).count("1")) * (1 if result == player else -1)
+            self.table[key] = (EXACT, score, None)
+            return score
+
+        empty = FULL & ~(x | o)
+        moves = [i for i in range(9) if empty & BITS[i]]
+        if entry is not None and entry[2] is not None:
+            hint = INVERSE[transform][entry[2]]
+            moves.remove(hint)
+            moves.insert(0, hint)
+
+        original_alpha = alpha
+        best_score, best = -float('inf'), None
+        for i in moves:
+            if player == 1:
+                score = -self.negamax(x | BITS[i], o, -1, -beta, -alpha)
+            else:
+                score = -self.negamax(x, o | BITS[i], 1, -beta, -alpha)
+            if score > best_score:
+                best_score, best = score, i
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (flag, best_score, TRANSFORMS[transform][best])
+        return best_score
+
+    def value(self, state, player):
+        # state is a bitboard int or any flat sequence of 9 cells.
+        if not isinstance(state, int):
+            state = encode(state)
+        if self.book is not None:
+            entry = self.book.lookup(state, player)
+            if entry is not None:
+                return entry[0]
+        return self.negamax(*masks(state), player)
+
+    def best_move(self, state, player):
+        if not isinstance(state, int):
+            state = encode(state)
+        if self.book is not None:
+            entry = self.book.lookup(state, player)
+            if entry is not None:
+                return entry[1]
+        self.negamax(*masks(state), player)
+        canonical, transform = canonicalize(state)
+        move = self.table[canonical | (player == -1) << 18][2]
+        return None if move is None else divmod(INVERSE[transform][move], 3)
+
+    def solve(self):
+        # Give every position reachable from the empty board, with either side
+        # starting, an exact value and best move. Returns those positions as
+        # (state, player) pairs.
+        seen = set()
+        stack = [(0, 0, 1), (0, 0, -1)]
+        while stack:
+            x, o, player = stack.pop()
+            if (x, o, player) in seen:
+                continue
+            seen.add((x, o, player))
+            self.negamax(x, o, player)
+            if winner(x, o) is None:
+                empty = FULL & ~(x | o)
+                for bit in BITS:
+                    if empty & bit:
+                        stack.append((x | bit, o, -1) if player == 1 else (x, o | bit, 1))
+        return [(x | o << 9, player) for x, o, player in seen]
@@ -0,0 +1,73 @@
+import argparse
+import random
+import tkinter as tk
+from tkinter import messagebox
+from bitboard import BitboardTicTacToe
+from checkpoint import load_q_table
+
+class TicTacToe:
+    # The AI vs AI window shared by tkv5.py and tkv6.py: two agent_class agents
+    # on one Q-table play a game on a BitboardTicTacToe.
+    def __init__(self, root, agent_class, agent_name, title="Tic Tac Toe RL", recorder=None):
+        self.root = root
+        self.recorder = recorder
+        self.agent_name = agent_name
+        self.root.title(title)
+        self.game = BitboardTicTacToe()
+        self.buttons = [[tk.Button(root, text="", font=("Arial", 20), height=2, width=5, state=tk.DISABLED) for c in range(3)] for r in range(3)]
+        for r in range(3):
+            for c in range(3):
+                self.buttons[r][c].grid(row=r, column=c)
+        self.agent1 = agent_class()
+        self.agent2 = agent_class()
+        self.agent1.q_table = self.agent2.q_table = load_q_table()
+        self.current_player = self.first = random.choice([1, -1])
+        self.make_random_first_move()
+        self.root.after(500, self.auto_play)
+
+    def make_random_first_move(self):
+        if self.current_player == 1:
+            self.play(random.choice(self.game.available_moves()))
+
+    def auto_play(self):
+        if not self.check_winner():
+            agent = self.agent1 if self.current_player == 1 else self.agent2
+            move = agent.best_action(self.game.get_state(), self.game.available_moves(), self.current_player)
+            if move:
+                self.play(move)
+            else:
+                self.current_player *= -1
+            self.root.after(500, self.auto_play)
+
+    def play(self, move):
+        self.game.make_move(*move, self.current_player)
+        self.buttons[move[0]][move[1]].config(text="X" if self.current_player == 1 else "O")
+        self.current_player *= -1
+
+    def check_winner(self):
+        winner = self.game.check_winner()
+        if winner is None:
+            return False
+        self.end_game("Draw!" if winner == 0 else f"Player {'X' if winner == 1 else 'O'} Wins!")
+        return True
+
+    def end_game(self, message):
+        if self.recorder is not None:
+            moves = [divmod(cell, 3) for cell, _, _ in self.game.history]
+            self.recorder.record(self.agent_name, self.agent_name, moves, self.game.check_winner(), self.first)
+        messagebox.showinfo("Game Over", message)
+        self.root.quit()
+
+def main(agent_class, agent_name, title, description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--record", help="append the game to this game record file (see records.py)")
+    args = parser.parse_args()
+    recorder = None
+    if args.record:
+        from records import GameRecorder
+        recorder = GameRecorder(args.record)
+    root = tk.Tk()
+    game = TicTacToe(root, agent_class, agent_name, title, recorder)
+    root.mainloop()
+    if recorder is not None:
+        recorder.close()
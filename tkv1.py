@@ -1,116 +1,81 @@
-import numpy as np
-import random
+import argparse
 import tkinter as tk
 from tkinter import messagebox
-
-class TicTacToe:
-    def __init__(self):
-        self.board = np.zeros((3, 3), dtype=int)
-
-    def reset(self):
-        self.board.fill(0)
-
-    def get_state(self):
-        return tuple(self.board.flatten())
-
-    def available_moves(self):
-        return [(r, c) for r in range(3) for c in range(3) if self.board[r, c] == 0]
-
-    def make_move(self, row, col, player):
-        self.board[row, col] = player
-
-    def check_winner(self):
-        for i in range(3):
-            if abs(sum(self.board[i, :])) == 3:
-                return np.sign(sum(self.board[i, :]))
-            if abs(sum(self.board[:, i])) == 3:
-                return np.sign(sum(self.board[:, i]))
-        if abs(sum([self.board[i, i] for i in range(3)])) == 3:
-            return np.sign(sum([self.board[i, i] for i in range(3)]))
-        if abs(sum([self.board[i, 2 - i] for i in range(3)])) == 3:
-            return np.sign(sum([self.board[i, 2 - i]]))
-        if len(self.available_moves()) == 0:
-            return 0  # Draw
-        return None
-
-class MinimaxAgent:
-    def minimax(self, game, depth, is_max):
-        winner = game.check_winner()
-        if winner == 1:
-            return 10 - depth
-        elif winner == -1:
-            return depth - 10
-        elif winner == 0:
-            return 0
-        
-        if is_max:
-            best_score = -float('inf')
-            for move in game.available_moves():
-                game.make_move(*move, 1)
-                score = self.minimax(game, depth + 1, False)
-                game.make_move(*move, 0)
-                best_score = max(best_score, score)
-            return best_score
-        else:
-            best_score = float('inf')
-            for move in game.available_moves():
-                game.make_move(*move, -1)
-                score = self.minimax(game, depth + 1, True)
-                game.make_move(*move, 0)
-                best_score = min(best_score, score)
-            return best_score
-
-    def best_move(self, game):
-        best_score = -float('inf')
-        best_move = None
-        for move in game.available_moves():
-            game.make_move(*move, 1)
-            score = self.minimax(game, 0, False)
-            game.make_move(*move, 0)
-            if score > best_score:
-                best_score = score
-                best_move = move
-        return best_move
+from concurrent.futures import ThreadPoolExecutor
+from bitboard import BitboardTicTacToe
+from core import MinimaxAgent
+from mcts import MCTSAgent
 
 class TicTacToeApp:
-    def __init__(self, root):
+    def __init__(self, root, size=3, win_length=None, time_limit=1.0, agent_type="minimax", recorder=None):
         self.root = root
+        self.agent_type = agent_type
+        self.recorder = recorder
         self.root.title("Tic Tac Toe RL")
-        self.game = TicTacToe()
-        self.opponent = MinimaxAgent()
-        self.buttons = [[None for _ in range(3)] for _ in range(3)]
+        self.size = size
+        self.game = BitboardTicTacToe(size, win_length)
+        if agent_type == "mcts":
+            self.opponent = MCTSAgent(time_ms=time_limit * 1000)
+        else:
+            self.opponent = MinimaxAgent(time_limit=time_limit)
+        self.buttons = [[None for _ in range(size)] for _ in range(size)]
+        # The AI searches on a worker thread; pending is its future and
+        # generation invalidates a result that arrives after a reset.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = None
+        self.generation = 0
         self.create_board()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
     
     def create_board(self):
-        for r in range(3):
-            for c in range(3):
-                self.buttons[r][c] = tk.Button(self.root, text="", font=("Arial", 24), height=2, width=5,
+        small = self.size <= 4
+        for r in range(self.size):
+            for c in range(self.size):
+                self.buttons[r][c] = tk.Button(self.root, text="", font=("Arial", 24 if small else 12),
+                                               height=2 if small else 1, width=5 if small else 2,
                                                command=lambda row=r, col=c: self.on_click(row, col))
                 self.buttons[r][c].grid(row=r, column=c)
+        self.status = tk.Label(self.root, text="", font=("Arial", 12))
+        self.status.grid(row=self.size, column=0, columnspan=self.size)
     
     def on_click(self, row, col):
-        if self.game.board[row, col] == 0:
+        if self.pending is None and self.game.board[row, col] == 0:
             self.game.make_move(row, col, 1)
             self.update_board()
             if self.check_game_over():
                 return
-            move = self.opponent.best_move(self.game)
-            if move:
-                self.game.make_move(*move, -1)
-            self.update_board()
-            self.check_game_over()
+            self.pending = self.executor.submit(self.opponent.best_move, self.game.copy())
+            self.status.config(text="AI is thinking...")
+            self.root.after(10, self.poll_opponent, self.pending, self.generation)
+    
+    def poll_opponent(self, future, generation):
+        if generation != self.generation:
+            return
+        if not future.done():
+            self.root.after(10, self.poll_opponent, future, generation)
+            return
+        self.pending = None
+        self.status.config(text="")
+        move = future.result()
+        if move:
+            self.game.make_move(*move, -1)
+        self.update_board()
+        self.check_game_over()
     
     def update_board(self):
-        for r in range(3):
-            for c in range(3):
-                if self.game.board[r, c] == 1:
+        board = self.game.board
+        for r in range(self.size):
+            for c in range(self.size):
+                if board[r, c] == 1:
                     self.buttons[r][c].config(text="X", fg="blue")
-                elif self.game.board[r][c] == -1:
+                elif board[r][c] == -1:
                     self.buttons[r][c].config(text="O", fg="red")
     
     def check_game_over(self):
         winner = self.game.check_winner()
         if winner is not None:
+            if self.recorder is not None and self.size == 3 and self.game.win_length == 3:
+                self.recorder.record("human", self.agent_type, [divmod(cell, 3) for cell, _, _ in self.game.history], winner)
             if winner == 1:
                 messagebox.showinfo("Game Over", "You Win!")
             elif winner == -1:
@@ -122,12 +87,42 @@ class TicTacToeApp:
         return False
     
     def reset_game(self):
+        self.generation += 1
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+        self.status.config(text="")
         self.game.reset()
-        for r in range(3):
-            for c in range(3):
+        for r in range(self.size):
+            for c in range(self.size):
                 self.buttons[r][c].config(text="")
+    
+    def close(self):
+        self.reset_game()
+        self.executor.shutdown(wait=False)
+        self.root.destroy()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play against the AI")
+    parser.add_argument("--size", type=int, default=3, help="board is SIZE x SIZE")
+    parser.add_argument("--win-length", type=int, default=None, help="stones in a row to win (default: min(size, 5))")
+    parser.add_argument("--time-limit", type=float, default=1.0, help="AI seconds per move on boards above 3 x 3")
+    parser.add_argument("--agent", choices=["minimax", "mcts"], default="minimax",
+                        help="mcts searches for --time-limit seconds on every board size")
+    parser.add_argument("--trace", help="write a Chrome trace and the stats of the AI moves here (see instrument.py)")
+    parser.add_argument("--record", help="append 3 x 3 games to this game record file (see records.py)")
+    args = parser.parse_args()
+    if args.trace:
+        import instrument
+        instrument.enable(MinimaxAgent)
+    recorder = None
+    if args.record:
+        from records import GameRecorder
+        recorder = GameRecorder(args.record)
     root = tk.Tk()
-    app = TicTacToeApp(root)
-    root.mainloop()
\ No newline at end of file
+    app = TicTacToeApp(root, args.size, args.win_length, args.time_limit, args.agent, recorder)
+    root.mainloop()
+    if recorder is not None:
+        recorder.close()
+    if args.trace:
+        instrument.STATS.dump_trace(args.trace)
\ No newline at end of file
@@ -0,0 +1,188 @@
+import argparse
+import multiprocessing
+import random
+import time
+from collections import Counter
+
+from bitboard import BitboardTicTacToe
+from checkpoint import CHECKPOINT_PATH, CheckpointWriter, load_checkpoint
+from core import QLearningAgent
+from qtable import as_dense
+from replay import ReplayBuffer
+
+
+def play_episode(agent, game):
+    # One self-play game with the agent on both sides. Each player's previous
+    # move is updated once the opponent has replied, and both last moves get the
+    # final reward (+1 win, -1 loss, 0 draw) when the game ends.
+    state = game.reset()
+    player = 1
+    last = {1: None, -1: None}
+    while True:
+        action = agent.best_action(state, game.available_moves())
+        if last[player] is not None:
+            agent.update_q_value(*last[player], 0, state)
+        game.make_move(*action, player)
+        next_state = game.get_state()
+        winner = game.check_winner()
+        if winner is not None:
+            reward = 1 if winner == player else 0
+            agent.update_q_value(state, action, reward, next_state)
+            if last[-player] is not None:
+                agent.update_q_value(*last[-player], -reward, next_state)
+            return winner
+        last[player] = (state, action)
+        state = next_state
+        player = -player
+
+
+def use_replay(agent, replay):
+    # Sends the agent's transitions to the replay buffer instead of updating
+    # its table one at a time; the table is then trained with replay.learn.
+    def store(state, action, reward, next_state):
+        if agent.symmetric:
+            state, action, _ = agent.canonical(state, action)
+            next_state = agent.canonical(next_state)[0]
+        replay.add(state, action, reward, next_state)
+
+    agent.q_table = as_dense(agent.q_table)
+    agent.update_q_value = store
+
+
+def train(agent, episodes, checkpoint=CHECKPOINT_PATH, checkpoint_every=100000, report_every=10000, start=0,
+          replay=None, batch_size=256, replay_every=4):
+    # With a replay buffer the table learns only from it: every replay_every
+    # episodes, one batched update of batch_size sampled transitions.
+    game = BitboardTicTacToe()
+    results = {1: 0, -1: 0, 0: 0}
+    if replay is not None:
+        use_replay(agent, replay)
+    writer = CheckpointWriter(checkpoint, agent.symmetric, agent.q_table if start else None)
+    started = time.perf_counter()
+    for episode in range(start + 1, start + episodes + 1):
+        results[play_episode(agent, game)] += 1
+        if replay is not None and episode % replay_every == 0:
+            replay.learn(agent.q_table, batch_size, agent.alpha, agent.gamma)
+        if report_every and episode % report_every == 0:
+            elapsed = time.perf_counter() - started
+            print(f"episode {episode}: {(episode - start) / elapsed:.0f} episodes/sec, "
+                  f"X {results[1]} O {results[-1]} draw {results[0]}, {len(agent.q_table)} q-values")
+        if checkpoint and checkpoint_every and episode % checkpoint_every == 0:
+            writer.save(agent.q_table, episode)
+    if checkpoint:
+        writer.save(agent.q_table, start + episodes)
+    return results
+
+
+def self_play_worker(args):
+    # Plays episodes on a private copy of the master table and returns the
+    # change to every q-value it touched with the number of updates behind it.
+    q_table, alpha, gamma, epsilon, symmetric, episodes, seed = args
+    random.seed(seed)
+    agent = QLearningAgent(alpha, gamma, epsilon, symmetric=symmetric)
+    agent.q_table = q_table.copy()
+    visits = Counter()
+    update_q_value = agent.update_q_value
+
+    def counted_update(state, action, reward, next_state):
+        visits[agent.canonical(state, action)[:2] if symmetric else (state, action)] += 1
+        update_q_value(state, action, reward, next_state)
+
+    agent.update_q_value = counted_update
+    game = BitboardTicTacToe()
+    results = Counter(play_episode(agent, game) for _ in range(episodes))
+    deltas = {key: (agent.q_table[key] - q_table.get(key, 0.0), n) for key, n in visits.items()}
+    return deltas, results
+
+
+def merge_deltas(q_table, worker_deltas, mode="mean"):
+    # "mean" moves each q-value by the visit-weighted average of the workers'
+    # changes; "sum" applies every worker's change as if they ran in sequence.
+    totals = {}
+    for deltas in worker_deltas:
+        for key, (delta, n) in deltas.items():
+            total, visits = totals.get(key, (0.0, 0))
+            totals[key] = (total + (delta * n if mode == "mean" else delta), visits + n)
+    for key, (total, visits) in totals.items():
+        q_table[key] = q_table.get(key, 0.0) + (total / visits if mode == "mean" else total)
+
+
+def train_parallel(agent, episodes, workers, seed=0, sync_every=10000, merge="mean",
+                   checkpoint=CHECKPOINT_PATH, checkpoint_every=100000, start=0):
+    # Rounds of sync_every episodes per worker, merged into agent.q_table after
+    # each round. Worker seeds derive from (seed, episode, worker) so a run is
+    # reproducible for a given seed and worker count.
+    results = Counter()
+    writer = CheckpointWriter(checkpoint, agent.symmetric, agent.q_table if start else None)
+    started = time.perf_counter()
+    episode = start
+    with multiprocessing.Pool(workers) as pool:
+        while episode < start + episodes:
+            # The last round splits what is left so the counts add up exactly.
+            round_size = min(sync_every * workers, start + episodes - episode)
+            counts = [round_size // workers + (w < round_size % workers) for w in range(workers)]
+            jobs = [(agent.q_table, agent.alpha, agent.gamma, agent.epsilon, agent.symmetric, count,
+                     f"{seed}-{episode}-{w}") for w, count in enumerate(counts) if count]
+            outputs = pool.map(self_play_worker, jobs)
+            merge_deltas(agent.q_table, [deltas for deltas, _ in outputs], merge)
+            for _, worker_results in outputs:
+                results.update(worker_results)
+            previous, episode = episode, episode + round_size
+            elapsed = time.perf_counter() - started
+            print(f"episode {episode}: {(episode - start) / elapsed:.0f} episodes/sec on {workers} workers, "
+                  f"X {results[1]} O {results[-1]} draw {results[0]}, {len(agent.q_table)} q-values")
+            if checkpoint and checkpoint_every and episode // checkpoint_every > previous // checkpoint_every:
+                writer.save(agent.q_table, episode)
+    if checkpoint:
+        writer.save(agent.q_table, episode)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Q-learning self-play")
+    parser.add_argument("--episodes", type=int, default=1000000)
+    parser.add_argument("--alpha", type=float, default=0.1)
+    parser.add_argument("--gamma", type=float, default=0.9)
+    parser.add_argument("--epsilon", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--checkpoint-every", type=int, default=100000)
+    parser.add_argument("--report-every", type=int, default=10000)
+    parser.add_argument("--resume", action="store_true", help="continue from the existing checkpoint")
+    parser.add_argument("--workers", type=int, default=1, help="self-play processes (1 trains in this process)")
+    parser.add_argument("--sync-every", type=int, default=10000, help="episodes per worker between merges")
+    parser.add_argument("--merge", choices=["mean", "sum"], default="mean")
+    parser.add_argument("--dense", action="store_true", help="store q-values in a DenseQTable array")
+    parser.add_argument("--symmetric", action="store_true", help="share q-values between symmetric positions")
+    parser.add_argument("--replay", type=int, default=0, metavar="CAPACITY",
+                        help="learn from batches drawn from a replay buffer of this many transitions")
+    parser.add_argument("--batch-size", type=int, default=256, help="transitions per replay update")
+    parser.add_argument("--replay-every", type=int, default=4, help="episodes between replay updates")
+    parser.add_argument("--prioritized", action="store_true", help="sample replay batches by TD error")
+    args = parser.parse_args()
+    if args.replay and args.workers > 1:
+        parser.error("--replay trains in one process; drop --workers")
+
+    random.seed(args.seed)
+    agent = QLearningAgent(args.alpha, args.gamma, args.epsilon, args.dense, args.symmetric)
+    start = 0
+    if args.resume:
+        saved = load_checkpoint(args.checkpoint)
+        agent.q_table = saved["q_table"]
+        agent.symmetric = saved.get("symmetric", False)
+        start = saved.get("episodes", 0)
+    if args.workers > 1:
+        # Worker seeds derive from this one, so draw and show it when none was given.
+        seed = random.randrange(2 ** 32) if args.seed is None else args.seed
+        if args.seed is None:
+            print(f"seed {seed} (pass --seed {seed} to repeat this run)")
+        train_parallel(agent, args.episodes, args.workers, seed, args.sync_every, args.merge,
+                       args.checkpoint, args.checkpoint_every, start)
+    else:
+        replay = ReplayBuffer(args.replay, args.prioritized, seed=args.seed) if args.replay else None
+        train(agent, args.episodes, args.checkpoint, args.checkpoint_every, args.report_every, start,
+              replay, args.batch_size, args.replay_every)
+
+
+if __name__ == "__main__":
+    main()